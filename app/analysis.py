@@ -0,0 +1,339 @@
+"""Offline analysis of the question bank.
+
+Measures how expensive each stored answer is to parse and compare, and
+records an expected verification strategy and time budget for it. It also
+precomputes fingerprints and normalized spellings of the correct forms of
+each answer, so most correct submissions are accepted by a lookup. The result
+is written to ``data/question_metadata.json`` next to the bank so the game
+can pick its verification path ahead of time.
+
+Run ``python analysis.py`` from the ``app`` directory after editing
+``questions.py`` to regenerate the metadata file. ``mathgame build-bank``
+also embeds the metadata in the compiled question bank, which the game
+prefers when it is up to date; see ``build_bank.py``.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from sympy import Function, Pow, preorder_traversal, expand, factor, simplify
+from sympy.core.function import AppliedUndef
+from sympy.core.relational import Equality
+from sympy.parsing.latex import parse_latex, LaTeXParsingError
+from sympy.printing.latex import latex as print_latex
+from questions import QUESTIONS, compact_bank, iter_questions, question_kind
+from verify import DEFAULT_STRATEGY, DEFAULT_TIMEOUT, fingerprint, lists_roots, normalize_latex
+
+METADATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "question_metadata.json")
+
+BANK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "question_bank.json")
+
+# Base time budget in seconds for each verification strategy.
+STRATEGY_TIMEOUTS = {"structural": 0.5, "expand": 1.0, "simplify": 3.0, "expanded": 1.0, "factored": 1.0}
+
+# Strategies of question kinds that ask for the answer in a particular form.
+# Other kinds accept any answer equal to the stored one.
+FORM_STRATEGIES = {"expand": "expanded", "factor": "factored", "simplify": "structural"}
+
+# Rewrites of the stored answer that are accepted as well, by question kind.
+VARIANT_REWRITES = {"expand": (expand,), "factor": (factor,), "simplify": (simplify,)}
+
+# Expressions with at most this many nodes are compared structurally.
+STRUCTURAL_MAX_SIZE = 5
+
+# Number of parses averaged when measuring parse time.
+PARSE_REPEATS = 3
+
+
+def analyze_answer(latex, question=""):
+    """Analyze a single stored answer.
+
+    Args:
+        latex (str): The answer in LaTeX format.
+        question (str, optional): The question, whose kind decides the
+            strategy of questions that ask for a particular form.
+
+    Returns:
+        dict: Metadata with the keys "parse_ms", "tree_size", "free_symbols",
+            "strategy", "timeout", "fingerprints" and "accepted_text". If the
+            answer cannot be parsed, the dict only contains "error".
+    """
+    try:
+        start = time.perf_counter()
+        for _ in range(PARSE_REPEATS):
+            expr = parse_latex(latex)
+        parse_ms = (time.perf_counter() - start) * 1000 / PARSE_REPEATS
+    except LaTeXParsingError as e:
+        return {"error": str(e)}
+
+    kind = question_kind(question)[0]
+    tree_size = sum(1 for _ in preorder_traversal(expr))
+    strategy = choose_strategy(expr, tree_size, kind)
+    # Larger trees get proportionally more time, never less than the base budget.
+    timeout = STRATEGY_TIMEOUTS[strategy] * max(1.0, tree_size / 20)
+    # parse_latex reads only the first of several roots, so a list of roots
+    # is looked up by its own spelling alone and otherwise compared root by root.
+    forms = [] if lists_roots(latex) else variant_forms(expr, kind)
+    fingerprints = {fingerprint(form) for form in forms}
+
+    return {
+        "parse_ms": round(parse_ms, 3),
+        "tree_size": tree_size,
+        "free_symbols": sorted(str(s) for s in expr.free_symbols),
+        "strategy": strategy,
+        "timeout": round(timeout, 2),
+        "fingerprints": sorted(fingerprints),
+        "accepted_text": accepted_spellings(latex, forms, fingerprints),
+    }
+
+
+def variant_forms(expr, kind=None):
+    """Generate the forms of an answer that are accepted without comparing.
+
+    Only forms that answer the question are generated: the expanded form of
+    an "Expand" answer, the factored form of a "Factor" answer and the
+    simplified form of a "Simplify" answer. Other rewrites would accept
+    answers in the form the question starts from, and questions of other
+    kinds accept any equal answer by comparison anyway, so they only get the
+    answer itself. For equations only the right-hand side is rewritten.
+
+    Args:
+        expr (sympy.Basic): The parsed answer.
+        kind (str, optional): Kind of the question, see
+            ``questions.question_kind``. Defaults to None (unknown).
+
+    Returns:
+        list: Distinct accepted expressions, starting with the answer itself.
+    """
+    if isinstance(expr, Equality):
+        return [Equality(expr.lhs, form, evaluate=False) for form in variant_forms(expr.rhs, kind)]
+
+    forms = [expr]
+    for rewrite in VARIANT_REWRITES.get(kind, ()):
+        try:
+            form = rewrite(expr)
+        except (TypeError, ValueError, NotImplementedError):
+            continue
+        if form not in forms:
+            forms.append(form)
+    return forms
+
+
+def accepted_spellings(answer, forms, fingerprints):
+    """Collect normalized LaTeX spellings that are known to be correct.
+
+    Besides the stored answer itself, the LaTeX printed by SymPy for each
+    variant form is accepted, but only if parsing it back gives one of the
+    accepted fingerprints. This keeps printer output that ``parse_latex``
+    reads differently out of the lookup table.
+
+    Args:
+        answer (str): The stored answer in LaTeX format.
+        forms (list): Accepted variant forms, see variant_forms.
+        fingerprints (set): Fingerprints of the accepted variant forms.
+
+    Returns:
+        list: Sorted normalized spellings.
+    """
+    spellings = {normalize_latex(answer)}
+    for form in forms:
+        text = print_latex(form)
+        try:
+            if fingerprint(parse_latex(text)) in fingerprints:
+                spellings.add(normalize_latex(text))
+        except LaTeXParsingError:
+            continue
+    return sorted(spellings)
+
+
+def choose_strategy(expr, tree_size, kind=None):
+    """Pick the cheapest verification strategy expected to work for an answer.
+
+    Questions that ask for a particular form get the strategy of their kind
+    from FORM_STRATEGIES, since an equal answer in another form, such as the
+    question's own expression, is not correct. For the other questions,
+    small expressions are compared structurally, since there are few other
+    reasonable ways to write them and those are covered by the precomputed
+    variant forms. Expressions containing functions or
+    symbolic exponents need ``simplify``; everything else is a polynomial or
+    rational expression that ``expand`` can decide. Undefined functions such
+    as the ``f'(x)`` in derivative answers are treated like symbols.
+
+    Args:
+        expr (sympy.Basic): The parsed answer.
+        tree_size (int): Number of nodes in the expression tree.
+        kind (str, optional): Kind of the question, see
+            ``questions.question_kind``. Defaults to None (unknown).
+
+    Returns:
+        str: Name of the verification strategy.
+    """
+    if kind in FORM_STRATEGIES:
+        return FORM_STRATEGIES[kind]
+    for node in preorder_traversal(expr):
+        if isinstance(node, Function) and not isinstance(node, AppliedUndef):
+            return "simplify"
+        if isinstance(node, Pow) and not node.exp.is_number:
+            return "simplify"
+    if tree_size <= STRUCTURAL_MAX_SIZE:
+        return "structural"
+    return "expand"
+
+
+def analyze_bank(questions=QUESTIONS):
+    """Analyze every question in the bank.
+
+    Args:
+        questions (dict, optional): Question bank to analyze. Defaults to QUESTIONS.
+
+    Returns:
+        dict: Metadata keyed by question identifier.
+    """
+    # The first parse loads the ANTLR grammar, keep it out of the measurements.
+    parse_latex("x")
+    metadata = {}
+    for qid, subject, difficulty, question_data in iter_questions(questions):
+        metadata[qid] = analyze_answer(question_data["answer"], question_data["question"])
+    return metadata
+
+
+def write_metadata(metadata, path=METADATA_PATH):
+    """Write question metadata to a JSON file.
+
+    Args:
+        metadata (dict): Metadata keyed by question identifier.
+        path (str, optional): Output file. Defaults to METADATA_PATH.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(metadata, f, indent=1, sort_keys=True)
+
+
+def load_metadata(path=METADATA_PATH):
+    """Load question metadata written by ``write_metadata``.
+
+    Prints a warning if the file is missing or invalid but continues, so the
+    game still works with the default verification strategy. Fingerprints and
+    accepted spellings are turned into sets for constant-time lookups.
+
+    Args:
+        path (str, optional): Metadata file. Defaults to METADATA_PATH.
+
+    Returns:
+        dict: Metadata keyed by question identifier, or an empty dict.
+    """
+    try:
+        with open(path, "r") as f:
+            return _freeze(json.load(f))
+    except FileNotFoundError:
+        print(f"Warning: Could not find question metadata at {path}")
+    except ValueError as e:
+        print(f"Warning: Invalid question metadata at {path}: {e}")
+    return {}
+
+
+def _freeze(metadata):
+    """Turn the lookup lists of loaded metadata into frozensets, in place.
+
+    Args:
+        metadata (dict): Metadata keyed by question identifier.
+
+    Returns:
+        dict: The same metadata.
+    """
+    for entry in metadata.values():
+        entry["fingerprints"] = frozenset(entry.get("fingerprints", ()))
+        entry["accepted_text"] = frozenset(entry.get("accepted_text", ()))
+    return metadata
+
+
+def source_hash(questions=QUESTIONS):
+    """Fingerprint the contents of a question bank.
+
+    Args:
+        questions (dict, optional): Question bank. Defaults to QUESTIONS.
+
+    Returns:
+        str: Hex digest that changes whenever a question, answer or
+            question identifier changes.
+    """
+    entries = [[qid, question_data] for qid, _, _, question_data in iter_questions(questions)]
+    text = json.dumps(entries, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def load_bank(path=BANK_PATH):
+    """Load the compiled question bank written by ``build_bank.py``.
+
+    Falls back to QUESTIONS and the metadata file, with a warning, if the
+    compiled bank is missing, invalid or was built from a different version
+    of ``questions.py``.
+
+    Args:
+        path (str, optional): Compiled bank file. Defaults to BANK_PATH.
+
+    Returns:
+        tuple: (questions, metadata), where questions is organized by subject
+            and difficulty like QUESTIONS, with a ``QuestionRecord`` for each
+            question, and metadata is keyed by question identifier.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            bank = json.load(f)
+        if bank.get("source") != source_hash():
+            print(f"Warning: {path} is out of date, run 'mathgame build-bank'")
+        else:
+            entries = bank["questions"]
+            questions = {
+                subject: {difficulty: [entries[qid] for qid in qids] for difficulty, qids in levels.items()}
+                for subject, levels in bank["index"].items()
+            }
+            return compact_bank(questions), _intern_keys(_freeze(bank["metadata"]))
+    except FileNotFoundError:
+        print(f"Warning: Could not find compiled question bank at {path}")
+    except (ValueError, KeyError) as e:
+        print(f"Warning: Invalid compiled question bank at {path}: {e}")
+    return compact_bank(QUESTIONS), _intern_keys(load_metadata())
+
+
+def _intern_keys(metadata):
+    """Intern the question identifiers of metadata, so records and metadata share them."""
+    return {sys.intern(qid): entry for qid, entry in metadata.items()}
+
+
+def get_strategy(metadata, question_id, question=""):
+    """Look up the verification strategy and time budget for a question.
+
+    Args:
+        metadata (dict): Metadata keyed by question identifier.
+        question_id (str): Identifier of the question.
+        question (str, optional): The question, used when there is no
+            metadata for it.
+
+    Returns:
+        tuple: (strategy, timeout) for the question. Questions without
+            metadata get the strategy of their kind if they ask for a
+            particular form, otherwise the defaults from ``verify``.
+    """
+    entry = metadata.get(question_id, {})
+    fallback = FORM_STRATEGIES.get(question_kind(question or "")[0], DEFAULT_STRATEGY)
+    strategy = entry.get("strategy", fallback)
+    timeout = entry.get("timeout", DEFAULT_TIMEOUT)
+    return strategy, timeout
+
+
+def main():
+    """Analyze the question bank and write the metadata file."""
+    metadata = analyze_bank()
+    write_metadata(metadata)
+    errors = [qid for qid, entry in metadata.items() if "error" in entry]
+    print(f"Analyzed {len(metadata)} questions, wrote {METADATA_PATH}")
+    for qid in errors:
+        print(f"Could not parse answer for {qid}: {metadata[qid]['error']}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
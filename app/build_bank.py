@@ -0,0 +1,316 @@
+"""Check the question bank and compile it for the game.
+
+Every entry of ``questions.py`` is checked in a pool of worker processes:
+
+* the answer passes the lexer and ``parse_latex``;
+* "Simplify", "Expand" and "Factor" answers are equivalent to the question's
+  expression, expanded or factored as asked;
+* "Differentiate" answers equal the derivative of the given function;
+* "Solve" answers list exactly the real solutions of the equation;
+* the question's own expression is not accepted as its answer by the
+  verification metadata from ``analysis.py``.
+
+Entries whose answer is wrong or unparsable, or whose checks do not finish
+within CHECK_TIMEOUT, fail the build, and nothing is written. With
+``--strict`` warnings, such as questions of a kind there is no check for,
+fail it as well. Otherwise the bank is written to ``data/question_bank.json``
+together with the verification metadata from ``analysis.py`` and an index of
+question identifiers by subject and difficulty. The game loads this file
+through ``analysis.load_bank``.
+
+Usage::
+
+    mathgame build-bank
+    mathgame build-bank --workers 4 --strict
+"""
+
+import argparse
+import json
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from sympy import E, Symbol, diff, factor_list, simplify, solveset, S
+from sympy.core.function import AppliedUndef
+from sympy.core.relational import Equality
+from sympy.sets.sets import FiniteSet
+from analysis import BANK_PATH, analyze_answer, source_hash
+from lexer import validate_latex, LaTeXSyntaxError
+from questions import QUESTIONS, iter_questions, question_kind
+from verify import is_expanded, multiply_applications, parse_answer, split_roots, verify_answer
+
+# Seconds the checks of a single entry may take.
+CHECK_TIMEOUT = 30.0
+
+
+class CheckTimeout(Exception):
+    """Raised when the checks of an entry take longer than CHECK_TIMEOUT."""
+
+
+def parse_math(latex):
+    """Parse LaTeX for checking, fixing up two ways parse_latex misreads the bank.
+
+    ``e`` is read as a symbol rather than Euler's number, and a letter
+    followed by brackets, as in ``x(x+5)``, as a function application. Both
+    are turned back into what the question means.
+
+    Args:
+        latex (str): LaTeX to parse.
+
+    Returns:
+        sympy.Basic: The parsed expression.
+    """
+    expr = parse_answer(latex).subs(Symbol("e"), E)
+    return multiply_applications(expr)
+
+
+def check_entry(question, answer):
+    """Check that a stored answer answers its question.
+
+    Args:
+        question (str): The question, such as "Solve: 2x = 10".
+        answer (str): The stored answer in LaTeX format.
+
+    Returns:
+        tuple: (errors, warnings), lists of messages. Questions of a kind
+            there is no check for get a warning.
+    """
+    errors = []
+    warnings = []
+    try:
+        validate_latex(answer)
+        parsed = parse_answer(answer)
+    except LaTeXSyntaxError as e:
+        return [f"answer is not valid LaTeX: {e}"], warnings
+    except CheckTimeout:
+        raise
+    except Exception as e:
+        return [f"answer does not parse: {e}"], warnings
+    if any(len(node.func.__name__) == 1 for node in parsed.atoms(AppliedUndef)):
+        warnings.append("parse_latex reads a letter before brackets in the answer as a function; "
+                        "checked as a product")
+
+    kind, body = question_kind(question)
+    if kind is None:
+        warnings.append(f"no check for questions starting with '{question.partition(':')[0].strip()}'")
+        return errors, warnings
+
+    if kind == "solve":
+        _check_solution(body, answer, errors)
+    elif kind == "derivative":
+        _check_derivative(body, answer, errors)
+    else:
+        _check_rewrite(kind, body, answer, errors, warnings)
+    return errors, warnings
+
+
+def _check_rewrite(kind, body, answer, errors, warnings):
+    """Check a Simplify, Expand or Factor answer against the question's expression."""
+    original = parse_math(body)
+    result = parse_math(answer)
+    if simplify(original - result) != 0:
+        errors.append(f"answer {result} is not equal to {original}")
+    elif kind == "expand" and not is_expanded(result):
+        warnings.append(f"answer {result} is not fully expanded")
+    elif kind == "factor" and len(factor_list(result)[1]) < 2 and not result.is_Pow:
+        warnings.append(f"answer {result} is not factored")
+
+
+def _check_derivative(body, answer, errors):
+    """Check a Differentiate answer, given a question body like "f(x)=x^2"."""
+    function = parse_math(body)
+    variable = Symbol("x")
+    if isinstance(function, Equality):
+        if isinstance(function.lhs, AppliedUndef) and len(function.lhs.args) == 1:
+            variable = function.lhs.args[0]
+        function = function.rhs
+    result = parse_math(answer)
+    if isinstance(result, Equality):
+        result = result.rhs
+    derivative = diff(function, variable)
+    if simplify(derivative - result) != 0:
+        errors.append(f"answer {result} is not the derivative {derivative}")
+
+
+def _check_solution(body, answer, errors):
+    """Check that a Solve answer lists every real solution and nothing else."""
+    equation = parse_math(body)
+    if not isinstance(equation, Equality):
+        errors.append("question is not an equation")
+        return
+    split = split_roots(answer)
+    if split is None:
+        errors.append("answer is not of the form variable = roots")
+        return
+    variable = parse_math(split[0])
+    roots = {simplify(parse_math(root)) for root in split[1]}
+    solutions = solveset(equation.lhs - equation.rhs, variable, S.Reals)
+    if not isinstance(solutions, FiniteSet):
+        errors.append(f"solutions {solutions} cannot be listed")
+    elif set(solutions) != roots:
+        errors.append(f"answer lists {sorted(roots, key=str)}, the solutions are {sorted(solutions, key=str)}")
+
+
+def check_own_expression(question, answer, metadata):
+    """Check that a question's own expression is not accepted as its answer.
+
+    The precomputed forms and the strategy of a question must not accept
+    the expression the player is asked to rewrite or solve.
+
+    Args:
+        question (str): The question, such as "Expand: (x+2)(x+3)".
+        answer (str): The stored answer in LaTeX format.
+        metadata (dict): Verification metadata of the question, as returned
+            by ``analysis.analyze_answer``.
+
+    Returns:
+        list: Error messages.
+    """
+    body = question_kind(question)[1]
+    try:
+        accepted = verify_answer(body, answer, metadata, metadata["strategy"], metadata["timeout"])
+    except CheckTimeout:
+        raise
+    except Exception:
+        # An expression the game cannot parse is not accepted either
+        return []
+    return [f"the question's own expression {body} is accepted as its answer"] if accepted else []
+
+
+def _init_worker():
+    """Prepare a worker process: load the LaTeX grammar and install the alarm handler."""
+    parse_answer("x")
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _on_alarm(signum, frame):
+    """Interrupt checks that have run out of time."""
+    raise CheckTimeout()
+
+
+def build_entry(item):
+    """Check and analyze one question in a worker process.
+
+    Args:
+        item (tuple): (question_id, question_data).
+
+    Returns:
+        tuple: (question_id, errors, warnings, metadata).
+    """
+    qid, question_data = item
+    question = question_data.get("question")
+    answer = question_data.get("answer")
+    if not isinstance(question, str) or not isinstance(answer, str) or not answer.strip():
+        return qid, ["entry needs a question and an answer"], [], {}
+
+    alarm = hasattr(signal, "SIGALRM")
+    if alarm:
+        signal.setitimer(signal.ITIMER_REAL, CHECK_TIMEOUT)
+    metadata = {}
+    try:
+        errors, warnings = check_entry(question, answer)
+        if not errors:
+            metadata = analyze_answer(answer, question)
+            if "error" not in metadata:
+                errors.extend(check_own_expression(question, answer, metadata))
+    except CheckTimeout:
+        errors, warnings = [f"could not be checked within {CHECK_TIMEOUT:g}s"], []
+    except Exception as e:
+        errors, warnings = [f"could not be checked: {e}"], []
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return qid, errors, warnings, metadata
+
+
+def build_bank(questions=QUESTIONS, workers=None):
+    """Check every question and compile the bank.
+
+    Args:
+        questions (dict, optional): Question bank. Defaults to QUESTIONS.
+        workers (int, optional): Number of worker processes. Defaults to the
+            number of CPUs.
+
+    Returns:
+        tuple: (bank, problems), where bank is the compiled bank as written
+            to BANK_PATH and problems maps question identifiers to their
+            (errors, warnings).
+    """
+    items = []
+    entries = {}
+    index = {}
+    seen = {}
+    problems = {}
+    for qid, subject, difficulty, question_data in iter_questions(questions):
+        if qid in entries:
+            # Identifiers hash the question, so a level cannot ask the same question twice
+            errors, warnings = problems.get(qid, ([], []))
+            problems[qid] = (errors + ["the same question is asked twice at this difficulty"], warnings)
+            continue
+        items.append((qid, question_data))
+        entries[qid] = question_data
+        index.setdefault(subject, {}).setdefault(difficulty, []).append(qid)
+        key = (subject, question_data.get("question"))
+        if key in seen:
+            problems[qid] = ([], [f"same question as {seen[key]}"])
+        seen.setdefault(key, qid)
+
+    metadata = {}
+    with ProcessPoolExecutor(workers or os.cpu_count() or 1, initializer=_init_worker) as pool:
+        for qid, errors, warnings, entry in pool.map(build_entry, items):
+            metadata[qid] = entry
+            if errors or warnings:
+                previous_errors, previous_warnings = problems.get(qid, ([], []))
+                problems[qid] = (previous_errors + errors, previous_warnings + warnings)
+
+    bank = {"source": source_hash(questions), "index": index, "questions": entries, "metadata": metadata}
+    return bank, problems
+
+
+def write_bank(bank, path=BANK_PATH):
+    """Write the compiled bank to a JSON file.
+
+    Args:
+        bank (dict): Compiled bank, as returned by build_bank.
+        path (str, optional): Output file. Defaults to BANK_PATH.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(bank, f, indent=1, sort_keys=True, ensure_ascii=False)
+
+
+def main(argv=None):
+    """Check the question bank and write the compiled bank.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Process exit code, 1 if any entry failed its checks.
+    """
+    parser = argparse.ArgumentParser(prog="mathgame build-bank",
+                                     description="Check the question bank and compile it for the game.")
+    parser.add_argument("-o", "--output", default=BANK_PATH, help="compiled bank file")
+    parser.add_argument("--workers", type=int, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--strict", action="store_true", help="also fail on warnings")
+    args = parser.parse_args(argv)
+
+    bank, problems = build_bank(workers=args.workers)
+    error_count = warning_count = 0
+    for qid in sorted(problems):
+        errors, warnings = problems[qid]
+        question = bank["questions"][qid].get("question")
+        for message in errors:
+            print(f"ERROR   {qid} ({question}): {message}")
+        for message in warnings:
+            print(f"warning {qid} ({question}): {message}")
+        error_count += len(errors)
+        warning_count += len(warnings)
+
+    print(f"Checked {len(bank['questions'])} questions: {error_count} errors, {warning_count} warnings")
+    if error_count or (args.strict and warning_count):
+        print("Question bank not written")
+        return 1
+    write_bank(bank, args.output)
+    print(f"Wrote {args.output}")
+    return 0
@@ -1,28 +1,103 @@
+import heapq
 import sqlite3
+from questions import QUESTIONS, question_id
+
+# Number of entries kept on each leaderboard.
+LEADERBOARD_SIZE = 100
+
+# PRAGMA user_version of a database whose question ratings and review items
+# are keyed by the hashed identifiers of questions.question_id. Version 0
+# keyed them by the question's position in its list.
+SCHEMA_VERSION = 1
+
+# SQL expressions naming the leaderboards a score row belongs to. "{row}" is
+# replaced by the row alias (NEW inside the trigger, scores when rebuilding).
+BOARD_EXPRESSIONS = [
+    "'all'",
+    "'difficulty:' || {row}.difficulty",
+    "'subject:' || {row}.subject",
+    "'day:' || date({row}.date)",
+    "'week:' || strftime('%Y-W%W', {row}.date)",
+]
+
+
+def _aggregate_trigger():
+    """Build the trigger that keeps the aggregate tables up to date.
+
+    For every inserted score it raises the player's best score if needed,
+    adds the score to each of its leaderboards and evicts the lowest entry
+    of a leaderboard that grew past LEADERBOARD_SIZE. Each step touches a
+    single key or walks the (board, score) index, so inserts stay cheap no
+    matter how many scores are stored.
+
+    Returns:
+        str: The CREATE TRIGGER statement.
+    """
+    boards = [expression.format(row="NEW") for expression in BOARD_EXPRESSIONS]
+    statements = "".join(f"""
+            INSERT INTO leaderboard (board, score_id, name, score, difficulty, subject, date)
+            VALUES ({board}, NEW.id, NEW.name, NEW.score, NEW.difficulty, NEW.subject, NEW.date);
+            DELETE FROM leaderboard WHERE rowid IN (
+                SELECT rowid FROM leaderboard WHERE board = {board}
+                ORDER BY score ASC, score_id DESC
+                LIMIT max(0, (SELECT COUNT(*) FROM leaderboard WHERE board = {board}) - {LEADERBOARD_SIZE})
+            );""" for board in boards)
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS scores_aggregate AFTER INSERT ON scores
+        BEGIN
+            INSERT INTO player_best (name, score, difficulty, subject, date)
+            VALUES (NEW.name, NEW.score, NEW.difficulty, NEW.subject, NEW.date)
+            ON CONFLICT(name) DO UPDATE SET
+                score = excluded.score, difficulty = excluded.difficulty,
+                subject = excluded.subject, date = excluded.date
+            WHERE excluded.score > player_best.score;{statements}
+        END
+    """
+
 
 class DatabaseManager:
     """Manages database operations for storing and retrieving game scores.
-    
+
     This class handles all interactions with the SQLite database, including
     creating tables, saving scores, and retrieving score history.
+
+    Besides the raw scores table, the database keeps aggregate tables that a
+    trigger updates on every insert: each player's best score, and the top
+    LEADERBOARD_SIZE scores overall, per difficulty, per subject, per day and
+    per week. Leaderboard pages and rank lookups read these through their
+    indexes instead of sorting the whole scores table.
+
+    The player_ratings and question_ratings tables hold the Elo ratings used
+    by the adaptive difficulty scheduler, and review_items the spaced-repetition
+    schedule of each player's missed and slow questions.
+
+    Attributes:
+        db_path (str): Path to the SQLite database file.
     """
-    
-    def __init__(self):
-        """Initialize the database manager."""
-        pass
+
+    def __init__(self, db_path="scores.db"):
+        """Initialize the database manager.
+
+        Args:
+            db_path (str, optional): Path to the SQLite database file. Defaults to "scores.db".
+        """
+        self.db_path = db_path
 
     def init_db(self):
         """Initialize the database by creating the scores table if it doesn't exist.
-        
+
         This should be called at application startup to ensure the database
-        is properly set up before any operations.
-        
+        is properly set up before any operations. Also creates the aggregate
+        tables and their trigger, and fills them from existing scores when
+        the trigger is first created. Ratings and review items saved by an
+        older version are moved to the current question identifiers.
+
         Returns:
             bool: True if initialization successful, False if database error occurred.
         """
         conn = None
         try:
-            conn = sqlite3.connect('scores.db')
+            conn = sqlite3.connect(self.db_path)
             c = conn.cursor()
             c.execute('''
                 CREATE TABLE IF NOT EXISTS scores (
@@ -34,6 +109,67 @@ class DatabaseManager:
                 date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            # Used to skip duplicates when importing scores from other machines
+            c.execute('CREATE INDEX IF NOT EXISTS idx_scores_dedupe ON scores (name, date, score)')
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS player_best (
+                name TEXT PRIMARY KEY,
+                score INTEGER,
+                difficulty TEXT,
+                subject TEXT,
+                date TIMESTAMP
+                )
+            ''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_player_best_score ON player_best (score DESC)')
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS leaderboard (
+                board TEXT,
+                score_id INTEGER,
+                name TEXT,
+                score INTEGER,
+                difficulty TEXT,
+                subject TEXT,
+                date TIMESTAMP,
+                PRIMARY KEY (board, score_id)
+                )
+            ''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_rank ON leaderboard (board, score DESC)')
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS player_ratings (
+                name TEXT PRIMARY KEY,
+                rating REAL,
+                answers INTEGER,
+                avg_time REAL
+                )
+            ''')
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS question_ratings (
+                question_id TEXT PRIMARY KEY,
+                rating REAL,
+                attempts INTEGER
+                )
+            ''')
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS review_items (
+                name TEXT,
+                question_id TEXT,
+                easiness REAL,
+                interval REAL,
+                repetitions INTEGER,
+                due TIMESTAMP,
+                PRIMARY KEY (name, question_id)
+                )
+            ''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_review_due ON review_items (name, due)')
+            c.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'scores_aggregate'")
+            has_trigger = c.fetchone() is not None
+            if not has_trigger:
+                c.execute(_aggregate_trigger())
+                self._rebuild_aggregates(c)
+            c.execute('PRAGMA user_version')
+            if c.fetchone()[0] < SCHEMA_VERSION:
+                self._migrate_question_ids(c)
+                c.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
             conn.commit()
             return True
         
@@ -43,6 +179,26 @@ class DatabaseManager:
             if conn:
                 conn.close()
 
+    def _migrate_question_ids(self, c):
+        """Rename positional question identifiers such as "algebra/easy/3".
+
+        The positions are those of the current QUESTIONS, which are the
+        positions the old identifiers were saved with as long as the bank
+        was not reordered before upgrading. Rows of questions that no longer
+        exist keep their old identifier and are ignored by the game.
+
+        Args:
+            c (sqlite3.Cursor): Cursor of an open transaction.
+        """
+        renames = [
+            (question_id(subject, difficulty, question_data["question"]), f"{subject}/{difficulty}/{index}")
+            for subject, levels in QUESTIONS.items()
+            for difficulty, questions_list in levels.items()
+            for index, question_data in enumerate(questions_list)
+        ]
+        c.executemany('UPDATE question_ratings SET question_id = ? WHERE question_id = ?', renames)
+        c.executemany('UPDATE review_items SET question_id = ? WHERE question_id = ?', renames)
+
     def save_score(self, name, score, difficulty, subject):
         """Save a player's score to the database.
         
@@ -60,7 +216,7 @@ class DatabaseManager:
         """
         conn = None
         try:
-            conn = sqlite3.connect('scores.db')
+            conn = sqlite3.connect(self.db_path)
             c = conn.cursor()
 
             c.execute('''
@@ -76,6 +232,311 @@ class DatabaseManager:
             if conn:
                 conn.close()
         
+    def _rebuild_aggregates(self, c):
+        """Recompute the aggregate tables from the scores table.
+
+        Used when the aggregates are first created on a database that
+        already holds scores.
+
+        Args:
+            c (sqlite3.Cursor): Cursor of an open transaction.
+        """
+        c.execute('DELETE FROM player_best')
+        c.execute('DELETE FROM leaderboard')
+        self._merge_aggregates(c, 0)
+
+    def _merge_aggregates(self, c, first_id):
+        """Fold scores inserted without the trigger into the aggregate tables.
+
+        Player bests are upserted from the new rows grouped by name. For the
+        leaderboards, the new rows are streamed once and the best
+        LEADERBOARD_SIZE of each board are kept in a bounded heap; only those
+        candidates are inserted, and each touched board is then trimmed back
+        to LEADERBOARD_SIZE. No step sorts the whole scores table.
+
+        Args:
+            c (sqlite3.Cursor): Cursor of an open transaction.
+            first_id (int): Smallest score id that is not yet aggregated.
+        """
+        # SQLite takes the other columns from the row holding MAX(score)
+        c.execute('''
+            INSERT INTO player_best (name, score, difficulty, subject, date)
+            SELECT name, MAX(score), difficulty, subject, date
+            FROM scores WHERE id >= ? GROUP BY name
+            ON CONFLICT(name) DO UPDATE SET
+                score = excluded.score, difficulty = excluded.difficulty,
+                subject = excluded.subject, date = excluded.date
+            WHERE excluded.score > player_best.score
+        ''', (first_id,))
+
+        boards = ", ".join(expression.format(row="scores") for expression in BOARD_EXPRESSIONS)
+        c.execute(f'''
+            SELECT id, name, score, difficulty, subject, date, {boards}
+            FROM scores WHERE id >= ?
+        ''', (first_id,))
+        heaps = {}
+        while True:
+            rows = c.fetchmany(10000)
+            if not rows:
+                break
+            for row in rows:
+                # Highest score wins, and the earlier score wins a tie
+                entry = (row[2], -row[0], row[:6])
+                for board in row[6:]:
+                    heap = heaps.setdefault(board, [])
+                    if len(heap) < LEADERBOARD_SIZE:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+
+        c.executemany('''
+            INSERT OR IGNORE INTO leaderboard (board, score_id, name, score, difficulty, subject, date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', ((board,) + entry[2] for board, heap in heaps.items() for entry in heap))
+        c.executemany('''
+            DELETE FROM leaderboard WHERE board = ?1 AND rowid NOT IN (
+                SELECT rowid FROM leaderboard WHERE board = ?1
+                ORDER BY score DESC, score_id LIMIT ?2
+            )
+        ''', ((board, LEADERBOARD_SIZE) for board in heaps))
+
+    def get_top_scores(self, board="all", limit=LEADERBOARD_SIZE):
+        """Retrieve the top of a leaderboard.
+
+        Reads the maintained leaderboard table through its (board, score)
+        index, so the cost does not depend on the size of the scores table.
+
+        Args:
+            board (str, optional): Leaderboard name: "all", "difficulty:<level>",
+                "subject:<subjects>", "day:<YYYY-MM-DD>" or "week:<YYYY>-W<WW>".
+                Defaults to "all".
+            limit (int, optional): Maximum number of rows, at most
+                LEADERBOARD_SIZE. Defaults to LEADERBOARD_SIZE.
+
+        Returns:
+            list: List of tuples (name, score, difficulty, subject, date),
+                best first. Returns empty list if database error occurs.
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute('''
+                SELECT name, score, difficulty, subject, date
+                FROM leaderboard WHERE board = ?
+                ORDER BY score DESC, score_id LIMIT ?
+            ''', (board, limit))
+            return c.fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
+        finally:
+            if conn:
+                conn.close()
+
+    def get_player_rank(self, name):
+        """Look up a player's best score and rank among all players.
+
+        The player's best score is found by key. The rank counts the players
+        with a higher best score through the score index of the player_best
+        table, without sorting any table. That count walks every index entry
+        above the player, so it grows with the rank rather than with log n:
+        cheap near the top, and at worst one index scan of player_best,
+        which holds one row per player, not per score.
+
+        Args:
+            name (str): The player's name.
+
+        Returns:
+            tuple or None: (rank, best_score), where rank 1 is the best player,
+                or None if the player has no scores or a database error occurs.
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute('''
+                SELECT 1 + (SELECT COUNT(*) FROM player_best WHERE score > best.score), best.score
+                FROM player_best AS best WHERE best.name = ?
+            ''', (name,))
+            return c.fetchone()
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+        finally:
+            if conn:
+                conn.close()
+
+    def get_player_rating(self, name):
+        """Look up a player's adaptive difficulty rating.
+
+        Args:
+            name (str): The player's name.
+
+        Returns:
+            tuple or None: (rating, answers, avg_time), or None if the player
+                has not been rated yet or a database error occurs.
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute('SELECT rating, answers, avg_time FROM player_ratings WHERE name = ?', (name,))
+            return c.fetchone()
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+        finally:
+            if conn:
+                conn.close()
+
+    def get_question_ratings(self):
+        """Retrieve the adaptive difficulty ratings of all rated questions.
+
+        Returns:
+            dict: (rating, attempts) by question identifier. Returns an empty
+                dict if a database error occurs.
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute('SELECT question_id, rating, attempts FROM question_ratings')
+            return {question_id: (rating, attempts) for question_id, rating, attempts in c}
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return {}
+        finally:
+            if conn:
+                conn.close()
+
+    def save_ratings(self, player, question):
+        """Store a player's and a question's rating after an answer.
+
+        Both rows are upserted by primary key in one transaction.
+
+        Args:
+            player (tuple): (name, rating, answers, avg_time).
+            question (tuple): (question_id, rating, attempts).
+
+        Returns:
+            bool: True if save successful, False if database error occurred.
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute('''
+                INSERT INTO player_ratings (name, rating, answers, avg_time) VALUES (?, ?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                rating = excluded.rating, answers = excluded.answers, avg_time = excluded.avg_time
+            ''', player)
+            c.execute('''
+                INSERT INTO question_ratings (question_id, rating, attempts) VALUES (?, ?, ?)
+                ON CONFLICT (question_id) DO UPDATE SET
+                rating = excluded.rating, attempts = excluded.attempts
+            ''', question)
+            conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return False
+        finally:
+            if conn:
+                conn.close()
+
+    def get_review_item(self, name, question_id):
+        """Look up a question on a player's review list.
+
+        Args:
+            name (str): The player's name.
+            question_id (str): Identifier of the question.
+
+        Returns:
+            tuple or None: (easiness, interval, repetitions), or None if the
+                question is not on the list or a database error occurs.
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute('''
+                SELECT easiness, interval, repetitions FROM review_items
+                WHERE name = ? AND question_id = ?
+            ''', (name, question_id))
+            return c.fetchone()
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+        finally:
+            if conn:
+                conn.close()
+
+    def save_review_item(self, name, question_id, easiness, interval, repetitions, due):
+        """Add or reschedule a question on a player's review list.
+
+        Args:
+            name (str): The player's name.
+            question_id (str): Identifier of the question.
+            easiness (float): SM-2 easiness factor.
+            interval (float): Days until the next review.
+            repetitions (int): Successful reviews in a row.
+            due (str): Time of the next review, "YYYY-MM-DD HH:MM:SS" in UTC.
+
+        Returns:
+            bool: True if save successful, False if database error occurred.
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute('''
+                INSERT INTO review_items (name, question_id, easiness, interval, repetitions, due)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (name, question_id) DO UPDATE SET
+                easiness = excluded.easiness, interval = excluded.interval,
+                repetitions = excluded.repetitions, due = excluded.due
+            ''', (name, question_id, easiness, interval, repetitions, due))
+            conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return False
+        finally:
+            if conn:
+                conn.close()
+
+    def get_due_reviews(self, name, now, limit):
+        """Retrieve the questions a player is due to review, earliest first.
+
+        A single range scan of the (name, due) index, which stops after
+        limit rows however long the player's review list is.
+
+        Args:
+            name (str): The player's name.
+            now (str): Current time, "YYYY-MM-DD HH:MM:SS" in UTC.
+            limit (int): Maximum number of questions to return.
+
+        Returns:
+            list: List of tuples (question_id, due, easiness, interval, repetitions).
+                Returns empty list if database error occurs.
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute('''
+                SELECT question_id, due, easiness, interval, repetitions FROM review_items
+                WHERE name = ? AND due <= ? ORDER BY due LIMIT ?
+            ''', (name, now, limit))
+            return c.fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return []
+        finally:
+            if conn:
+                conn.close()
+
     def get_scores(self):
         """Retrieve all scores from the database sorted by score descending.
         
@@ -86,7 +547,7 @@ class DatabaseManager:
         """
         conn = None
         try:
-            conn = sqlite3.connect('scores.db')
+            conn = sqlite3.connect(self.db_path)
             c = conn.cursor()
             c.execute('''
                 SELECT name, score, difficulty, subject, date
@@ -101,3 +562,101 @@ class DatabaseManager:
             if conn:
                 conn.close()
 
+    def iter_scores(self, chunk_size=10000):
+        """Stream all scores from the database in insertion order.
+
+        Rows are fetched in chunks, so memory use is bounded by the chunk
+        size rather than by the number of stored scores.
+
+        Args:
+            chunk_size (int, optional): Number of rows fetched at a time. Defaults to 10000.
+
+        Yields:
+            list: Lists of up to chunk_size tuples (name, score, difficulty, subject, date).
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute('''
+                SELECT name, score, difficulty, subject, date
+                FROM scores ORDER BY id
+            ''')
+            while True:
+                rows = c.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+        finally:
+            if conn:
+                conn.close()
+
+    def import_scores(self, rows, batch_size=10000):
+        """Insert many scores in a single transaction, skipping duplicates.
+
+        A row is a duplicate if a score with the same name, date and score
+        already exists, either in the database or earlier in the input. Rows
+        are consumed in batches with executemany, so the input can be a
+        generator over a file of any size. The aggregate trigger is dropped
+        during the import and the new rows are merged into the aggregates
+        once at the end, which is much faster than updating them row by row.
+
+        Args:
+            rows (iterable): Tuples (name, score, difficulty, subject, date). A
+                date of None is replaced by the current time.
+            batch_size (int, optional): Number of rows per executemany call. Defaults to 10000.
+
+        Returns:
+            int or None: Number of rows inserted, or None if a database error
+                occurred, in which case nothing is imported.
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            c = conn.cursor()
+            # A larger page cache keeps the dedupe index in memory during the import
+            c.execute('PRAGMA cache_size = -65536')
+            c.execute('BEGIN')
+            c.execute('DROP TRIGGER IF EXISTS scores_aggregate')
+            c.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM scores")
+            first_id = c.fetchone()[0]
+            changes_before = conn.total_changes
+            batch = []
+            for row in rows:
+                batch.append(tuple(row))
+                if len(batch) >= batch_size:
+                    self._insert_new_scores(c, batch)
+                    batch = []
+            if batch:
+                self._insert_new_scores(c, batch)
+            inserted = conn.total_changes - changes_before
+            c.execute(_aggregate_trigger())
+            self._merge_aggregates(c, first_id)
+            c.execute('COMMIT')
+            return inserted
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            if conn and conn.in_transaction:
+                conn.execute('ROLLBACK')
+            return None
+        finally:
+            if conn:
+                conn.close()
+
+    def _insert_new_scores(self, c, batch):
+        """Insert a batch of score rows that are not already stored.
+
+        Args:
+            c (sqlite3.Cursor): Cursor of an open transaction.
+            batch (list): Tuples (name, score, difficulty, subject, date).
+        """
+        c.executemany('''
+            INSERT INTO scores (name, score, difficulty, subject, date)
+            SELECT ?1, ?2, ?3, ?4, COALESCE(?5, CURRENT_TIMESTAMP)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM scores
+                WHERE name = ?1 AND date = COALESCE(?5, CURRENT_TIMESTAMP) AND score = ?2
+            )
+        ''', batch)
@@ -0,0 +1,296 @@
+"""Startup time and memory measurements of the game.
+
+``mathgame --startup-report`` starts the game, prints how long the window
+took to appear and how much memory the game uses, including the Chromium
+processes QtWebEngine starts, and quits. ``mathgame startup-report`` runs
+that in both the default and the lite mode and compares them.
+
+``mathgame --memory-report`` (and ``mathgame simulate --memory-report``)
+traces Python allocations with tracemalloc and, on exit, breaks the memory
+down by subsystem. Allocations are attributed to the innermost frame that
+belongs to a subsystem in SUBSYSTEMS. Memory allocated outside Python's
+allocator, such as Qt's widgets, SQLite and the interpreter itself, is not
+traced and is reported as the rest of the resident memory. Most of Qt's
+memory in the default mode belongs to QtWebEngine's renderer processes,
+which are reported on their own line.
+
+Usage::
+
+    mathgame startup-report
+    mathgame startup-report --repeats 5
+    mathgame --memory-report
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# Time after the window is shown before memory is measured, so the web
+# views have started their renderer processes.
+SETTLE_MS = 1500
+
+# Command line flags of each compared mode.
+MODES = {"default": [], "lite": ["--lite"]}
+
+# Frames kept per traced allocation. Library allocations are recognized by
+# their innermost frames, so a few are enough; each extra frame makes
+# tracing slower and its bookkeeping bigger.
+MEMORY_FRAMES = 8
+
+# Subsystems of the memory report and the files that belong to them: game
+# modules by file name, libraries by a directory in their path.
+SUBSYSTEMS = [
+    ("question bank", ("questions.py", "analysis.py", "build_bank.py")),
+    ("parsing and parse cache", ("verify.py", "lexer.py", "/sympy/", "/antlr4/")),
+    ("rendering and render cache", ("render.py", "/matplotlib/", "/PIL/")),
+    ("Qt (Python side)", ("gui.py", "/PyQt5/")),
+    ("scores and ratings", ("db.py", "scheduler.py", "review.py", "/sqlite3/")),
+    # Code of imported modules, whose own frames are below the import machinery
+    ("module code", ("<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>")),
+]
+
+
+def _rss_bytes(pid):
+    """Resident memory of a process in bytes, from /proc, or None if unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def _descendants(pid):
+    """Process IDs of all descendants of a process, from /proc."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces, the fields after it do not
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    found = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), ()):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def memory_usage():
+    """Measure the memory used by this process and its child processes.
+
+    Returns:
+        dict: "rss_mb" of this process and "children_rss_mb" of its child
+            processes, such as QtWebEngine's renderers. Where /proc is not
+            available, "rss_mb" is the peak resident memory of this process
+            and "children_rss_mb" is None.
+    """
+    own = _rss_bytes(os.getpid())
+    if own is not None:
+        children = sum(_rss_bytes(pid) or 0 for pid in _descendants(os.getpid()))
+        return {"rss_mb": round(own / 2**20, 1), "children_rss_mb": round(children / 2**20, 1)}
+    try:
+        import resource
+    except ImportError:
+        return {"rss_mb": None, "children_rss_mb": None}
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    peak_bytes = peak if sys.platform == "darwin" else peak * 1024
+    return {"rss_mb": round(peak_bytes / 2**20, 1), "children_rss_mb": None}
+
+
+def start_memory_tracing():
+    """Start tracing Python allocations for the memory report.
+
+    Only allocations made after this call are traced, so call it as early
+    as possible.
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(MEMORY_FRAMES)
+
+
+def _file_subsystem(filename):
+    """Name the subsystem a source file belongs to, or None."""
+    filename = filename.replace(os.sep, "/")
+    basename = filename.rsplit("/", 1)[-1]
+    for name, patterns in SUBSYSTEMS:
+        for pattern in patterns:
+            if (pattern in filename) if pattern.startswith("/") else pattern == basename:
+                return name
+    return None
+
+
+def _subsystem(traceback, owners):
+    """Name the subsystem of an allocation from its traceback.
+
+    Args:
+        traceback (tracemalloc.Traceback): Where the memory was allocated.
+        owners (dict): Cache of _file_subsystem results by file name.
+
+    Returns:
+        str: The subsystem of the innermost frame that has one, or "other Python".
+    """
+    for frame in reversed(traceback):
+        filename = frame.filename
+        if filename not in owners:
+            owners[filename] = _file_subsystem(filename)
+        if owners[filename] is not None:
+            return owners[filename]
+    return "other Python"
+
+
+def memory_report():
+    """Break the memory of the game down by subsystem.
+
+    Returns:
+        dict: "subsystems" mapping subsystem names to traced MB, "traced_mb"
+            in total, "tracing_mb" used by tracemalloc itself, "rss_mb" of
+            the process, "untraced_mb" (native memory and the interpreter),
+            "children_rss_mb" of child processes such as QtWebEngine's
+            renderers, and "caches", the fill of the parse and render
+            caches. Empty if tracing was not started.
+    """
+    if not tracemalloc.is_tracing():
+        return {}
+    snapshot = tracemalloc.take_snapshot()
+    subsystems = {name: 0 for name, _ in SUBSYSTEMS}
+    subsystems["other Python"] = 0
+    owners = {}
+    for statistic in snapshot.statistics("traceback"):
+        subsystems[_subsystem(statistic.traceback, owners)] += statistic.size
+    traced = sum(subsystems.values())
+    report = {
+        "subsystems": {name: round(size / 2**20, 2) for name, size in subsystems.items()},
+        "traced_mb": round(traced / 2**20, 2),
+        "tracing_mb": round(tracemalloc.get_tracemalloc_memory() / 2**20, 2),
+    }
+    report.update(memory_usage())
+    if report["rss_mb"] is not None:
+        report["untraced_mb"] = round(report["rss_mb"] - report["traced_mb"] - report["tracing_mb"], 1)
+    caches = {}
+    # Only modules the game has loaded are inspected
+    if "verify" in sys.modules:
+        caches["parse"] = sys.modules["verify"].parse_answer.cache_info()._asdict()
+    if "render" in sys.modules:
+        caches["render"] = sys.modules["render"].render_png.cache_info()._asdict()
+    report["caches"] = caches
+    return report
+
+
+def print_memory_report(report=None):
+    """Print the memory report as a table.
+
+    Args:
+        report (dict, optional): Report to print. Defaults to a new memory_report().
+    """
+    report = memory_report() if report is None else report
+    if not report:
+        print("Memory report: tracing was not started")
+        return
+    print("Memory by subsystem (Python allocations traced by tracemalloc):")
+    for name, size in sorted(report["subsystems"].items(), key=lambda item: -item[1]):
+        print(f"  {name:<28} {size:>8.2f} MB")
+    print(f"  {'traced in total':<28} {report['traced_mb']:>8.2f} MB")
+    print(f"  {'tracemalloc bookkeeping':<28} {report['tracing_mb']:>8.2f} MB")
+    if report.get("untraced_mb") is not None:
+        print(f"  {'native (Qt, SQLite, ...)':<28} {report['untraced_mb']:>8.1f} MB")
+        print(f"  {'resident':<28} {report['rss_mb']:>8.1f} MB")
+    if report.get("children_rss_mb") is not None:
+        print(f"  {'Qt/WebEngine processes':<28} {report['children_rss_mb']:>8.1f} MB")
+    for name, info in report["caches"].items():
+        print(f"  {name} cache: {info['currsize']} of {info['maxsize']} entries, "
+              f"{info['hits']} hits, {info['misses']} misses")
+
+
+def startup_report(started, window_shown, lite):
+    """Collect the startup measurements of a running game.
+
+    Args:
+        started (float): ``time.perf_counter()`` when main() was entered.
+        window_shown (float): ``time.perf_counter()`` when the event loop
+            first ran with the window shown.
+        lite (bool): True if the game runs in lite mode.
+
+    Returns:
+        dict: Mode, startup time in ms, memory use and whether QtWebEngine
+            was imported.
+    """
+    report = {
+        "mode": "lite" if lite else "default",
+        "startup_ms": round((window_shown - started) * 1000, 1),
+        "webengine_imported": "PyQt5.QtWebEngineWidgets" in sys.modules,
+    }
+    report.update(memory_usage())
+    return report
+
+
+def measure(mode, main_path):
+    """Start the game in a mode and read its startup report.
+
+    Args:
+        mode (str): One of MODES.
+        main_path (str): Path of main.py.
+
+    Returns:
+        dict: The game's report, with "process_ms", the time from starting
+            the process to receiving the report, added.
+
+    Raises:
+        RuntimeError: If the game did not print a report.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, main_path, *MODES[mode], "--startup-report"],
+        capture_output=True, text=True, timeout=120,
+    )
+    elapsed = time.perf_counter() - start
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("{"):
+            report = json.loads(line)
+            report["process_ms"] = round(elapsed * 1000 - SETTLE_MS, 1)
+            return report
+    raise RuntimeError(f"{mode} mode did not report (exit code {result.returncode}):\n{result.stderr[-2000:]}")
+
+
+def main(argv=None):
+    """Compare startup time and memory of the default and lite modes.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(prog="mathgame startup-report",
+                                     description="Compare startup time and memory of the default and lite modes.")
+    parser.add_argument("--repeats", type=int, default=3, help="starts per mode; the fastest is shown (default: 3)")
+    args = parser.parse_args(argv)
+
+    main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    print(f"{'mode':<8} {'process ms':>10} {'window ms':>10} {'RSS MB':>8} {'children MB':>12}  QtWebEngine")
+    for mode in MODES:
+        try:
+            reports = [measure(mode, main_path) for _ in range(max(1, args.repeats))]
+        except (RuntimeError, OSError, subprocess.TimeoutExpired) as e:
+            print(f"Error: {e}")
+            return 1
+        best = min(reports, key=lambda report: report["process_ms"])
+        children = best["children_rss_mb"]
+        print(f"{mode:<8} {best['process_ms']:>10} {best['startup_ms']:>10} {best['rss_mb']:>8} "
+              f"{'n/a' if children is None else children:>12}  "
+              f"{'imported' if best['webengine_imported'] else 'not imported'}")
+        if mode != best["mode"]:
+            print(f"         ({mode} mode was not available and ran as {best['mode']})")
+    return 0
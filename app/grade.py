@@ -0,0 +1,379 @@
+"""Offline grading of answer sheets.
+
+Grades LaTeX answers with the same verification the game uses, so a class's
+answers can be checked in one run. Submissions are read as a stream from a
+JSONL or CSV file, verified in a pool of worker processes and written out in
+input order as soon as they are graded, so memory use does not grow with the
+size of the input.
+
+Each submission needs an ``answer`` and either a ``question_id`` from the
+question bank or the ``correct_answer`` itself. A ``correct_answer`` given
+along with a ``question_id`` replaces the bank's answer; the question still
+decides whether the answer must be in a particular form, such as expanded
+or factored. Other fields, such as the
+student's name, are copied to the output unchanged, followed by ``correct``
+(true, false, or empty if the answer could not be graded) and ``error``.
+
+Usage::
+
+    mathgame grade answers.jsonl -o graded.jsonl
+    mathgame grade class.csv --workers 8 --timeout 5
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import signal
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from analysis import load_bank, get_strategy
+from lexer import LaTeXSyntaxError
+from questions import get_question
+from verify import verify_answer
+
+FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+
+# Fields added to each submission in the output.
+RESULT_FIELDS = ["correct", "error"]
+
+# Seconds a single answer may take before it is reported as timed out.
+DEFAULT_TIMEOUT = 10.0
+
+# Batches sent to the pool ahead of the one being written, per worker.
+QUEUE_DEPTH = 2
+
+# Submissions handed to a worker at a time.
+BATCH_SIZE = 32
+
+# Question bank, metadata and time limit of the current process, set by _load_bank.
+_questions = {}
+_metadata = {}
+_timeout = DEFAULT_TIMEOUT
+
+
+class GradingTimeout(Exception):
+    """Raised inside a worker when an answer takes longer than the time limit."""
+
+
+def detect_format(path):
+    """Work out the file format from a file name.
+
+    Args:
+        path (str): Path of the submissions or results file.
+
+    Returns:
+        str: "jsonl" or "csv".
+
+    Raises:
+        ValueError: If the extension is not recognized.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unknown file format '{extension}', expected one of {', '.join(FORMATS)}")
+    return FORMATS[extension]
+
+
+def read_submissions(f, fmt):
+    """Stream submissions from an open file.
+
+    Args:
+        f (file): Text file to read from.
+        fmt (str): "jsonl" or "csv".
+
+    Yields:
+        dict: One submission per line or row. Blank JSONL lines are skipped.
+
+    Raises:
+        ValueError: If a JSONL line is not a JSON object.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+        return
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {number} is not a JSON object")
+        yield record
+
+
+def _init_worker(timeout):
+    """Prepare a worker process for grading.
+
+    Args:
+        timeout (float): Seconds a single answer may take.
+    """
+    # Diagnostics printed by the game code must not end up in the results,
+    # which may be written to standard output
+    sys.stdout = sys.stderr
+    _load_bank(timeout)
+
+
+def _load_bank(timeout):
+    """Load the question bank and set the time limit in this process.
+
+    Args:
+        timeout (float): Seconds a single answer may take.
+    """
+    global _questions, _metadata, _timeout
+    _questions, _metadata = load_bank()
+    _timeout = timeout
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _on_alarm(signum, frame):
+    """Interrupt an answer that has run out of time."""
+    raise GradingTimeout()
+
+
+def grade_submission(submission):
+    """Grade one answer.
+
+    The stored answer is parsed through the same cache as the player's, so
+    a worker parses each question's answer once however many students
+    answered it. The precomputed forms of the bank's answer are only used
+    when the answer key comes from the bank.
+
+    Args:
+        submission (tuple): (answer, question_id, correct_answer); either of
+            the last two may be None.
+
+    Returns:
+        tuple: (correct, error), where correct is True, False, or None if
+            the answer could not be graded, and error describes why.
+    """
+    answer, qid, correct_answer = submission
+    if not answer or not answer.strip():
+        return False, "empty answer"
+    if qid is None and correct_answer is None:
+        return None, "no question_id or correct_answer"
+    question = ""
+    if qid is not None:
+        try:
+            record = get_question(qid, _questions)[2]
+        except KeyError:
+            if correct_answer is None:
+                return None, f"unknown question {qid}"
+        else:
+            question = record.question
+    if correct_answer is None:
+        correct_answer = record.answer
+        metadata = _metadata
+    else:
+        # The precomputed forms of the bank's answer do not apply to another answer key
+        metadata = {}
+    strategy, timeout = get_strategy(metadata, qid, question)
+
+    alarm = hasattr(signal, "SIGALRM")
+    if alarm:
+        signal.setitimer(signal.ITIMER_REAL, _timeout)
+    try:
+        return verify_answer(answer, correct_answer, metadata.get(qid), strategy, timeout), ""
+    except GradingTimeout:
+        return None, f"timed out after {_timeout:g}s"
+    except LaTeXSyntaxError as e:
+        return False, f"invalid LaTeX: {e}"
+    except Exception as e:
+        return False, f"could not parse: {e}"
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _grade_batch(batch):
+    """Grade a list of submissions in a worker process.
+
+    A submission that fails in an unexpected way is reported as not graded,
+    so it does not stop the rest of the batch.
+
+    Args:
+        batch (list): (submission, error) tuples as returned by _task.
+
+    Returns:
+        list: (correct, error) for each submission.
+    """
+    results = []
+    for submission, error in batch:
+        if submission is None:
+            results.append((None, error))
+            continue
+        try:
+            results.append(grade_submission(submission))
+        except Exception as e:
+            results.append((None, f"could not be graded: {e}"))
+    return results
+
+
+def _batches(records, size):
+    """Group submissions into lists of at most size records."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _task(record):
+    """Extract the fields a worker needs from a submission.
+
+    Args:
+        record (dict): The submission.
+
+    Returns:
+        tuple: (submission, error), where submission is the tuple for
+            grade_submission, or None if a field is neither text nor a
+            number, and error says which field.
+    """
+    fields = []
+    for name in ("answer", "question_id", "correct_answer"):
+        value = record.get(name)
+        if value is None or value == "":
+            fields.append(None)
+        elif isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            return None, f"{name} must be text"
+        else:
+            # Numbers, as in {"answer": 5}, are graded as their LaTeX spelling
+            fields.append(str(value))
+    return tuple(fields), ""
+
+
+def grade_records(records, workers=None, timeout=DEFAULT_TIMEOUT):
+    """Grade a stream of submissions, yielding results in input order.
+
+    Submissions are sent to the pool in batches, and only a bounded number of
+    batches is in flight at a time, so the input is read no faster than it
+    is graded.
+
+    Args:
+        records (iterable): Submission dicts.
+        workers (int, optional): Number of worker processes. 1 grades in this
+            process. Defaults to the number of CPUs.
+        timeout (float, optional): Seconds a single answer may take. Defaults
+            to DEFAULT_TIMEOUT.
+
+    Yields:
+        dict: Each submission with RESULT_FIELDS added.
+    """
+    workers = workers or os.cpu_count() or 1
+    batches = _batches(records, BATCH_SIZE)
+    if workers == 1:
+        # Keep what the game code prints out of the results, as the workers
+        # do, but only while grading, so this process's output is unchanged
+        with contextlib.redirect_stdout(sys.stderr):
+            _load_bank(timeout)
+        for batch in batches:
+            with contextlib.redirect_stdout(sys.stderr):
+                results = _grade_batch([_task(record) for record in batch])
+            yield from _merge(batch, results)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(timeout,)) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append((batch, pool.submit(_grade_batch, [_task(record) for record in batch])))
+            if len(pending) >= workers * QUEUE_DEPTH:
+                batch, future = pending.popleft()
+                yield from _merge(batch, future.result())
+        while pending:
+            batch, future = pending.popleft()
+            yield from _merge(batch, future.result())
+
+
+def _merge(batch, results):
+    """Add the grading results to their submissions."""
+    for record, (correct, error) in zip(batch, results):
+        record["correct"] = correct
+        record["error"] = error
+        yield record
+
+
+def write_results(results, f, fmt):
+    """Write graded submissions to an open file as they arrive.
+
+    CSV columns are taken from the first result; fields missing from later
+    results are left empty and extra ones are dropped.
+
+    Args:
+        results (iterable): Graded submission dicts.
+        f (file): Text file to write to.
+        fmt (str): "jsonl" or "csv".
+
+    Returns:
+        tuple: (graded, correct, ungraded) counts.
+    """
+    graded = correct = ungraded = 0
+    writer = None
+    for record in results:
+        if fmt == "csv":
+            if writer is None:
+                writer = csv.DictWriter(f, list(record), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerow(record)
+        else:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        graded += 1
+        correct += record["correct"] is True
+        ungraded += record["correct"] is None
+    f.flush()
+    return graded, correct, ungraded
+
+
+def main(argv=None):
+    """Run the grading command line tool.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(prog="mathgame grade", description="Grade LaTeX answer sheets.")
+    parser.add_argument("input", help="submissions file (.jsonl or .csv), or - for standard input")
+    parser.add_argument("-o", "--output", default="-", help="results file (default: standard output)")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())),
+                        help="input format, needed when reading standard input")
+    parser.add_argument("--output-format", choices=sorted(set(FORMATS.values())),
+                        help="output format (default: from the output file name, else the input format)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"seconds allowed per answer (default: {DEFAULT_TIMEOUT:g})")
+    args = parser.parse_args(argv)
+
+    try:
+        in_format = args.format or detect_format(args.input)
+        if args.output_format:
+            out_format = args.output_format
+        elif args.output != "-":
+            out_format = detect_format(args.output)
+        else:
+            out_format = in_format
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    infile = outfile = None
+    try:
+        infile = sys.stdin if args.input == "-" else open(args.input, "r", newline="", encoding="utf-8")
+        outfile = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+        results = grade_records(read_submissions(infile, in_format), args.workers, args.timeout)
+        graded, correct, ungraded = write_results(results, outfile, out_format)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if infile not in (None, sys.stdin):
+            infile.close()
+        if outfile not in (None, sys.stdout):
+            outfile.close()
+
+    print(f"Graded {graded} answers: {correct} correct, {graded - correct - ungraded} incorrect, "
+          f"{ungraded} not graded", file=sys.stderr)
+    return 0
@@ -1,7 +1,89 @@
+import json
 from PyQt5.QtWidgets import QMainWindow, QMenu, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit, QInputDialog, QTableWidgetItem, QTableWidget, QMessageBox
-from PyQt5.QtCore import Qt, QTimer, QUrl
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtCore import Qt, QTimer, QObject, QRunnable, QThreadPool, pyqtSignal
 from logic import GameManager
+from lexer import IncrementalValidator, LaTeXSyntaxError
+from verify import parse_answer
+from timing import Stopwatch
+from session import SessionJournal
+from replay import SessionRecorder
+from PyQt5.QtGui import QPixmap
+from render import QuestionView, render_png
+
+# Interval between clock redraws. The label is only updated when the shown
+# second changes, so a short interval costs almost nothing.
+CLOCK_REFRESH_MS = 200
+
+# Delay after the last keystroke before the answer is parsed for the preview.
+PREVIEW_DEBOUNCE_MS = 150
+
+# Font size of the answer preview in lite mode, in points.
+LITE_PREVIEW_FONT_SIZE = 16
+
+# Page for the answer preview. It is loaded once; later updates only call
+# setPreview() so MathJax does not have to be reloaded on every keystroke.
+PREVIEW_HTML = """
+<html>
+<head>
+    <script>
+        window.MathJax = {
+            tex: {inlineMath: [['\\\\(', '\\\\)']]},
+            startup: {typeset: false}
+        };
+        function setPreview(tex) {
+            var element = document.getElementById("preview");
+            element.textContent = tex ? "\\\\(" + tex + "\\\\)" : "";
+            if (window.MathJax && MathJax.typesetPromise) {
+                MathJax.typesetClear([element]);
+                MathJax.typesetPromise([element]);
+            }
+        }
+    </script>
+    <script src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
+</head>
+<body style="font-size: 22px; padding: 4px; text-align: center; font-family: Arial;">
+    <span id="preview"></span>
+</body>
+</html>
+"""
+
+
+class ParseWorkerSignals(QObject):
+    """Signals emitted by a ParseWorker.
+
+    Attributes:
+        finished (pyqtSignal): Emitted with (text, ok, result), where result is
+            the parsed expression as a string or the error message.
+    """
+    finished = pyqtSignal(str, bool, str)
+
+
+class ParseWorker(QRunnable):
+    """Background task that parses an answer for the live preview.
+
+    Parsing goes through the shared parse cache, so an answer that was
+    already parsed, or is parsed here before being submitted, is not
+    parsed again.
+    """
+
+    def __init__(self, text):
+        """Initialize the worker.
+
+        Args:
+            text (str): The answer to parse, in LaTeX format.
+        """
+        super().__init__()
+        self.text = text
+        self.signals = ParseWorkerSignals()
+
+    def run(self):
+        """Parse the answer and emit the result."""
+        try:
+            expr = parse_answer(self.text)
+        except Exception as e:
+            self.signals.finished.emit(self.text, False, str(e))
+            return
+        self.signals.finished.emit(self.text, True, str(expr))
 
 class MainWindow(QMainWindow):
     """Main window for the math game application.
@@ -10,25 +92,42 @@ class MainWindow(QMainWindow):
     question display area, answer input field, and control buttons.
     
     Attributes:
-        questionWidget (QLabel): Label widget displaying the current math question.
+        questionWidget (QuestionView): Widget displaying the current math question.
         answerInput (QLineEdit): Input field for the user's answer.
+        previewWidget (QWebEngineView or QLabel): Live rendering of the answer
+            being typed; a QLabel in lite mode.
+        lite (bool): True if the window uses only native widgets, without QtWebEngine.
+        parseStatusLabel (QLabel): Shows whether the answer being typed parses.
         submitButton (QPushButton): Button to submit the answer.
         skipButton (QPushButton): Button to skip the current question.
     """
     
-    def __init__(self):
-        """Initialize the main window and create the user interface."""
+    def __init__(self, lite=False):
+        """Initialize the main window and create the user interface.
+
+        Args:
+            lite (bool, optional): Render questions and the answer preview with
+                native widgets and never import QtWebEngine, which starts a
+                Chromium process. Defaults to False.
+        """
         super().__init__()
 
         # Initialize variables
+        self.lite = lite
         self.time_elapsed = 0
-        self.start_time = 0
+        self.stopwatch = Stopwatch()
         self.timer = QTimer()
         self.timer.timeout.connect(self._updateTimer)
         self.scoreboard_window = None
+        self.validator = IncrementalValidator()
+        self.parse_pool = QThreadPool()
+        self.parse_pool.setMaxThreadCount(1)
+        self.preview_timer = QTimer()
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.timeout.connect(self._startPreviewParse)
 
 
-        self.game_manager = GameManager(gui=self)
+        self.game_manager = GameManager(gui=self, journal=SessionJournal(), recorder=SessionRecorder())
         self._createUI()
         
     def _createUI(self):
@@ -41,13 +140,11 @@ class MainWindow(QMainWindow):
         central_widget = QWidget()
         main_layout = QVBoxLayout()
 
-        self.questionBrowser = QWebEngineView()
-        main_layout.addWidget(self.questionBrowser)
-        
         # Add different sections
         self._createMenuBar()
         main_layout.addWidget(self._createQuestionArea("Fråga"))
         main_layout.addWidget(self._createAnswerArea())
+        main_layout.addWidget(self._createPreviewArea())
         main_layout.addWidget(self._createButtonArea())
         main_layout.addWidget(self._createTimerArea())
         main_layout.addWidget(self._createPointArea())
@@ -59,23 +156,27 @@ class MainWindow(QMainWindow):
     def _createMenuBar(self):
         """Create the application menu bar.
         
-        Adds menu items for Preferences, Levels, Subjects, Start Game, and See Scores.
+        Adds menu items for Preferences, Levels, Subjects, Start Game, See Scores and Review.
         """
         menuBar = self.menuBar()
         self.levelMenu = QMenu("&Levels", self)
         self.subjectMenu = QMenu("&Subjects", self)
         self.startGameMenu = QMenu("&Start Game", self)
         self.seeScoresMenu = QMenu("&See Scores", self)
+        self.reviewMenu = QMenu("&Review", self)
         self.endGameMenu = QMenu("&End Game", self)
         menuBar.addMenu(self.levelMenu)
         menuBar.addMenu(self.subjectMenu)
         menuBar.addMenu(self.startGameMenu)
         menuBar.addMenu(self.seeScoresMenu)
+        menuBar.addMenu(self.reviewMenu)
         menuBar.addMenu(self.endGameMenu)
         self.endGameMenu.setEnabled(False)  # Disabled initially
 
         newGameAction = self.startGameMenu.addAction("New Game")
         newGameAction.triggered.connect(self.game_manager.start_game)
+        reviewAction = self.reviewMenu.addAction("Start Review")
+        reviewAction.triggered.connect(self.game_manager.start_review)
         # Adding subjects to menu
         self.selectAlgebra = self.subjectMenu.addAction("Algebra")
         self.selectEquations = self.subjectMenu.addAction("Equations")
@@ -87,9 +188,13 @@ class MainWindow(QMainWindow):
         # Adding levels to menu
         self.selectEasy = self.levelMenu.addAction("Easy")
         self.selectHard = self.levelMenu.addAction("Hard")
+        self.selectMixed = self.levelMenu.addAction("Mixed")
+        self.selectAdaptive = self.levelMenu.addAction("Adaptive")
         # Setting levels to checkable
         self.selectEasy.setCheckable(True)
         self.selectHard.setCheckable(True)
+        self.selectMixed.setCheckable(True)
+        self.selectAdaptive.setCheckable(True)
         # Connect to update game manager when changed
         self.selectAlgebra.triggered.connect(self.update_selected_subjects)
         self.selectEquations.triggered.connect(self.update_selected_subjects)
@@ -100,6 +205,8 @@ class MainWindow(QMainWindow):
         # Action for selecting difficulty
         self.selectEasy.triggered.connect(self.update_selected_difficulty)
         self.selectHard.triggered.connect(self.update_selected_difficulty)
+        self.selectMixed.triggered.connect(self.update_selected_difficulty)
+        self.selectAdaptive.triggered.connect(self.update_selected_difficulty)
         # Action for opening score menu
         self.seeScores = self.seeScoresMenu.addAction("Show Scores")
         self.seeScores.triggered.connect(self.open_scoreboard)
@@ -115,9 +222,9 @@ class MainWindow(QMainWindow):
             question (str): The LaTeX math question to display.
             
         Returns:
-            QWebEngineView: The web view widget containing the rendered question.
+            QuestionView: The widget showing the rendered question.
         """
-        self.questionWidget = QWebEngineView()
+        self.questionWidget = QuestionView(use_web=not self.lite)
         self.questionWidget.setMinimumHeight(150)  # Set minimum height
         self.questionWidget.setEnabled(False)  # Disabled until game starts
         
@@ -128,27 +235,14 @@ class MainWindow(QMainWindow):
     
     def update_question_display(self, latex_question):
         """Update the question display with LaTeX rendering.
+
+        MathJax renders are timed, and the question is drawn natively if
+        MathJax fails or is too slow; see ``render.QuestionView``.
         
         Args:
             latex_question (str): LaTeX formatted question string.
         """
-        html = f"""
-        <html>
-        <head>
-            <script>
-                window.MathJax = {{
-                    tex: {{inlineMath: [['$','$'], ['\\\\(','\\\\)']]}}
-                }};
-            </script>
-            <script src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
-        </head>
-        <body style="font-size: 30px; padding: 20px; text-align: center; font-family: Arial;">
-            <p><b>Question:</b></p>
-            <p>\\({latex_question}\\)</p>
-        </body>
-        </html>
-        """
-        self.questionWidget.setHtml(html)
+        self.questionWidget.show_question(latex_question)
     
     def _createAnswerArea(self):
         """Create the answer input field.
@@ -163,7 +257,107 @@ class MainWindow(QMainWindow):
         font.setPointSize(20)
         self.answerInput.setFont(font)
         self.answerInput.setEnabled(False)  # Disabled until game starts
+        self.answerInput.textChanged.connect(self.on_answer_changed)
         return self.answerInput
+
+    def _createPreviewArea(self):
+        """Create the live answer preview and parse status indicator.
+
+        Returns:
+            QWidget: Widget containing the preview and the status label.
+        """
+        preview_widget = QWidget()
+        preview_layout = QVBoxLayout()
+        preview_layout.setContentsMargins(0, 0, 0, 0)
+
+        if self.lite:
+            self.previewWidget = QLabel("")
+            self.previewWidget.setAlignment(Qt.AlignCenter)
+        else:
+            from PyQt5.QtWebEngineWidgets import QWebEngineView
+            self.previewWidget = QWebEngineView()
+            self.previewWidget.setHtml(PREVIEW_HTML)
+        self.previewWidget.setFixedHeight(60)
+        self.parseStatusLabel = QLabel("")
+        self.parseStatusLabel.setObjectName("parseStatus")
+        self.parseStatusLabel.setAlignment(Qt.AlignCenter)
+
+        preview_layout.addWidget(self.previewWidget)
+        preview_layout.addWidget(self.parseStatusLabel)
+        preview_widget.setLayout(preview_layout)
+        return preview_widget
+
+    def on_answer_changed(self, text):
+        """Validate the answer as it is typed and schedule a preview parse.
+
+        The structural check runs immediately, since it only re-lexes the
+        changed part of the answer. Parsing with SymPy is debounced and runs
+        on a background thread so typing stays responsive. The preview is
+        cleared while the answer is invalid, so it never shows an earlier
+        answer next to the current one.
+
+        Args:
+            text (str): The current contents of the answer field.
+        """
+        self.preview_timer.stop()
+        if not text.strip():
+            self.parseStatusLabel.setText("")
+            self._setPreview("")
+            return
+        try:
+            self.validator.validate(text)
+        except LaTeXSyntaxError as e:
+            self.parseStatusLabel.setText(f"✗ {e}")
+            self._setPreview("")
+            return
+        self.parseStatusLabel.setText("…")
+        self.preview_timer.start(PREVIEW_DEBOUNCE_MS)
+
+    def _startPreviewParse(self):
+        """Parse the current answer on the background thread pool."""
+        worker = ParseWorker(self.answerInput.text())
+        worker.signals.finished.connect(self._onPreviewParsed)
+        self.parse_pool.start(worker)
+
+    def _onPreviewParsed(self, text, ok, result):
+        """Show the result of a background parse.
+
+        Results for text that has changed since the parse started are ignored.
+
+        Args:
+            text (str): The answer that was parsed.
+            ok (bool): True if parsing succeeded.
+            result (str): The parsed expression, or the error message.
+        """
+        if text != self.answerInput.text():
+            return
+        if ok:
+            self.parseStatusLabel.setText(f"✓ {result}")
+            self._setPreview(text)
+        else:
+            self.parseStatusLabel.setText(f"✗ {result.splitlines()[0] if result else 'Could not parse'}")
+            self._setPreview("")
+
+    def _setPreview(self, latex):
+        """Render LaTeX in the preview without reloading the page.
+
+        In lite mode the preview is drawn with mathtext instead, falling back
+        to the plain LaTeX text.
+
+        Args:
+            latex (str): LaTeX to render, or an empty string to clear the preview.
+        """
+        if not self.lite:
+            self.previewWidget.page().runJavaScript(f"setPreview({json.dumps(latex)});")
+            return
+        png = render_png(f"${latex}$", LITE_PREVIEW_FONT_SIZE) if latex else None
+        pixmap = QPixmap()
+        if png is not None and pixmap.loadFromData(png, "PNG"):
+            self.previewWidget.setPixmap(pixmap)
+        else:
+            # setText keeps the previous pixmap when the text itself is unchanged
+            self.previewWidget.clear()
+            self.previewWidget.setText(latex)
     
     def _createButtonArea(self):
         """Create the button control area.
@@ -219,47 +413,49 @@ class MainWindow(QMainWindow):
         return self.pointsWidget
     
     def _updateTimer(self):
-        """Update the timer display by counting up.
+        """Update the timer display from the stopwatch.
         
-        Increments the elapsed time counter by 1 second and updates the
-        timer display widget. This is called automatically by the QTimer
-        every 1000ms (1 second).
+        Called automatically by the QTimer every CLOCK_REFRESH_MS. The shown
+        time is read from the stopwatch rather than counted in ticks, so it
+        stays correct when ticks are delayed, and the label is only redrawn
+        when the shown second changes.
         """
-        self.time_elapsed += 1
-        self.timerWidget.setText(f"Time: {self.time_elapsed}s")
+        seconds = int(self.stopwatch.elapsed())
+        if seconds != self.time_elapsed:
+            self.time_elapsed = seconds
+            self.timerWidget.setText(f"Time: {self.time_elapsed}s")
 
     def _startTimer(self):
         """Start the question timer.
         
-        Resets the elapsed time to 0, updates the display, and starts the QTimer
-        to increment every 1000ms (1 second). Records the current time for reference.
+        Resets the stopwatch and the display to 0 and starts the QTimer that
+        redraws the clock.
         """
-        import time
-        self.start_time = time.time()  # Store when timer started
+        self.stopwatch.start()
         self.time_elapsed = 0  # Reset to 0
         self.timerWidget.setText(f"Time: {self.time_elapsed}s")
-        self.timer.start(1000)  # Timer ticks every second (1000ms)
+        self.timer.start(CLOCK_REFRESH_MS)
         
     def _stopTimer(self):
-        """Stop the timer and return elapsed time.
+        """Pause the timer and return elapsed time.
         
         Returns:
-            int: The elapsed time in seconds since the timer was started.
+            float: The elapsed time in seconds since the timer was started,
+                excluding time spent paused.
         """
         self.timer.stop()
-        return self.time_elapsed  # Return elapsed seconds
+        self.stopwatch.pause()
+        return self.stopwatch.elapsed()
     
-    def _restart_timer(self, elapsed_time):
-        """Restart the timer from a specific elapsed time.
-        
-        Used when the player gives an incorrect answer and needs to try again
-        without resetting the timer to zero.
+    def _restart_timer(self):
+        """Resume the timer after it was paused by _stopTimer.
         
-        Args:
-            elapsed_time (int): The elapsed time in seconds to continue from.
+        Used when the player gives an incorrect or invalid answer and needs to
+        try again without resetting the timer to zero. Time spent checking the
+        answer and showing error dialogs is not counted.
         """
-        self.start_time = elapsed_time
-        self.timer.start(1000)
+        self.stopwatch.resume()
+        self.timer.start(CLOCK_REFRESH_MS)
     
     def on_submit(self):
         """Handle the submit button click.
@@ -276,7 +472,7 @@ class MainWindow(QMainWindow):
         
         Loads the next question without checking the current answer.
         """
-        self.game_manager.next_question()
+        self.game_manager.skip_question()
 
     def update_selected_subjects(self):
         """Update the game manager with selected subjects.
@@ -305,6 +501,10 @@ class MainWindow(QMainWindow):
             current_difficulty = "easy"
         if self.selectHard.isChecked():
             current_difficulty = "hard"
+        if self.selectMixed.isChecked():
+            current_difficulty = "mixed"
+        if self.selectAdaptive.isChecked():
+            current_difficulty = "adaptive"
         self.game_manager.set_difficulty(current_difficulty)
 
 
@@ -312,21 +512,41 @@ class MainWindow(QMainWindow):
         """Show dialog to save player's score.
         
         Displays an input dialog for the player to enter their name and save
-        their score to the database. Validates that the name is not empty or
-        whitespace-only and is within acceptable length limits (1-50 characters).
-        If validation fails, shows an error message and prompts again.
+        their score to the database. The name of an adaptive game's player is
+        filled in already.
         
         Returns:
             str or None: Player's name if they chose to save and name is valid,
                         None if cancelled.
         """
+        name = self.ask_player_name("Save Result?", "Name:", self.game_manager.player_name or "")
+        if name is None:
+            return None
+        self.game_manager.save_score(name)
+        return name
+
+    def ask_player_name(self, title, label, default=""):
+        """Ask the player for their name.
+
+        Validates that the name is not empty or whitespace-only and is within
+        acceptable length limits (1-50 characters). If validation fails, shows
+        an error message and prompts again.
+
+        Args:
+            title (str): Title of the input dialog.
+            label (str): Text shown next to the input field.
+            default (str, optional): Initial contents of the input field. Defaults to "".
+
+        Returns:
+            str or None: The name with surrounding whitespace removed, or None if cancelled.
+        """
         while True:
             name, ok = QInputDialog.getText(
                 self,
-                "Save Result?",
-                "Name:",
+                title,
+                label,
                 QLineEdit.Normal,
-                ""
+                default
             )
             
             if not ok:
@@ -351,10 +571,44 @@ class MainWindow(QMainWindow):
                 continue
             
             # Name is valid
-            self.game_manager.save_score(name.strip())
             return name.strip()
         
 
+    def offer_resume(self):
+        """Offer to resume a game that was interrupted by a crash.
+
+        Looks for a snapshot in the session journal and asks the player
+        whether to continue it. A declined or unusable snapshot is discarded.
+        """
+        journal = self.game_manager.journal
+        snapshot = journal.load()
+        if snapshot is None:
+            return
+        reply = QMessageBox.question(
+            self,
+            "Resume Game?",
+            f"An unfinished game was found: {snapshot.get('completed', 0)} questions answered, "
+            f"{snapshot.get('points', 0)} points.\n\nDo you want to continue it?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes
+        )
+        if reply == QMessageBox.Yes and self.game_manager.resume(snapshot):
+            self._syncMenus()
+            return
+        journal.clear()
+
+    def _syncMenus(self):
+        """Check the level and subject menu items matching the game manager's settings."""
+        difficulty = self.game_manager.current_difficulty
+        self.selectEasy.setChecked(difficulty == "easy")
+        self.selectHard.setChecked(difficulty == "hard")
+        self.selectMixed.setChecked(difficulty == "mixed")
+        self.selectAdaptive.setChecked(difficulty == "adaptive")
+        subjects = self.game_manager.selected_subjects
+        self.selectAlgebra.setChecked("algebra" in subjects)
+        self.selectEquations.setChecked("equations" in subjects)
+        self.selectCalculus.setChecked("calculus" in subjects)
+
     def open_scoreboard(self):
         """Open the scoreboard window.
         
@@ -374,7 +628,7 @@ class MainWindow(QMainWindow):
 class Scoreboard(QWidget):
     """Window displaying the high scores table.
     
-    This widget shows all saved scores from the database in a sortable table
+    This widget shows the best saved scores from the database in a sortable table
     format, including player names, scores, difficulty, subject, and date.
     
     Attributes:
@@ -399,8 +653,10 @@ class Scoreboard(QWidget):
     def load_scores(self):
         """Load and display scores from the database.
         
-        Queries the database for all scores via the GameManager, sorted by score
+        Queries the overall leaderboard via the GameManager, sorted by score
         in descending order, and populates the table widget with the results.
+        The leaderboard is maintained by the database on every save, so this
+        does not sort the full score history.
         Each row contains the player's name, score, difficulty, subject, and date.
         
         Note:
@@ -408,7 +664,7 @@ class Scoreboard(QWidget):
             will be empty but the application will continue running.
         """
 
-        rows = self.logic.get_scores()
+        rows = self.logic.get_top_scores()
 
         self.table.setRowCount(len(rows))
         self.table.setColumnCount(5)
@@ -0,0 +1,384 @@
+"""Fast structural validation of LaTeX answers.
+
+``parse_latex`` is slow to reject malformed input and reports errors as
+generic exceptions. This module tokenizes an answer in a single pass and
+checks the things players usually get wrong: unbalanced brackets, unknown
+commands, missing ``\\frac``/``\\sqrt`` arguments, dangling operators and text
+typed instead of math. Only input that passes is handed to SymPy.
+
+Arguments of ``\\frac`` and ``\\sqrt`` go in braces, except that ``\\frac``
+takes single digits without them, as in ``\\frac12``, like TeX and SymPy do.
+"""
+
+from collections import namedtuple
+
+Token = namedtuple("Token", ["kind", "value", "position"])
+Token.__doc__ = """A single LaTeX token.
+
+Attributes:
+    kind (str): One of "number", "letter", "command", "operator", "open" or "close".
+    value (str): The text of the token.
+    position (int): Index of the first character of the token in the input.
+"""
+
+# Commands understood by sympy's LaTeX parser that make sense in an answer.
+ALLOWED_COMMANDS = {
+    "frac", "dfrac", "tfrac", "sqrt", "cdot", "times", "div", "pm", "mp",
+    "ln", "log", "exp", "sin", "cos", "tan", "sec", "csc", "cot",
+    "arcsin", "arccos", "arctan", "sinh", "cosh", "tanh",
+    "pi", "infty", "theta", "alpha", "beta", "gamma", "lambda", "mu", "phi",
+    "left", "right", "le", "ge", "leq", "geq", "neq",
+}
+
+# Commands that only adjust spacing.
+SPACING_COMMANDS = {",", ";", ":", "!", " "}
+
+# Functions players often type without the backslash.
+FUNCTION_NAMES = {"sin", "cos", "tan", "sec", "csc", "cot", "ln", "log", "exp", "sqrt", "frac", "pi"}
+
+# Letter runs at least this long are treated as typed text rather than a product of variables.
+PROSE_MIN_LENGTH = 4
+
+OPERATORS = set("+-*/^_=,<>!'|")
+OPENING = {"{": "}", "(": ")", "[": "]"}
+CLOSING = {"}": "{", ")": "(", "]": "["}
+
+# Operators that need an operand on their left.
+BINARY_OPERATORS = {"*", "/", "^", "_", "=", "<", ">"}
+
+# Operators that cannot end an answer.
+TRAILING_OPERATORS = {"+", "-", "*", "/", "^", "_", "=", "<", ">", ","}
+
+
+class LaTeXSyntaxError(ValueError):
+    """Raised when an answer is structurally invalid LaTeX.
+
+    Attributes:
+        message (str): Human-readable description of the problem.
+        position (int): Index in the input where the problem was found.
+    """
+
+    def __init__(self, message, position):
+        """Initialize the error.
+
+        Args:
+            message (str): Human-readable description of the problem.
+            position (int): Index in the input where the problem was found.
+        """
+        super().__init__(f"{message} (at position {position + 1})")
+        self.message = message
+        self.position = position
+
+    def describe(self, text):
+        """Format the error with a caret pointing at the offending character.
+
+        Args:
+            text (str): The input the error was found in.
+
+        Returns:
+            str: Multi-line description suitable for showing to the player.
+        """
+        return f"{self.message}\n\n{text}\n{' ' * self.position}^"
+
+
+def tokenize(text, start=0):
+    """Split a LaTeX answer into tokens.
+
+    Whitespace and spacing commands such as ``\\,`` are skipped. Consecutive
+    digits (with an optional decimal point) form one number token; letters
+    are returned one at a time, since each letter is a separate variable.
+
+    Args:
+        text (str): The answer in LaTeX format.
+        start (int, optional): Index to start tokenizing at. Must be a token
+            boundary. Defaults to 0.
+
+    Returns:
+        list: List of Token tuples.
+
+    Raises:
+        LaTeXSyntaxError: If the input contains a character that cannot
+            appear in an answer.
+    """
+    tokens = []
+    i = start
+    n = len(text)
+    while i < n:
+        char = text[i]
+        if char.isspace():
+            i += 1
+        elif char == "\\":
+            end = i + 1
+            while end < n and text[end].isalpha():
+                end += 1
+            if end == i + 1:
+                if end == n:
+                    raise LaTeXSyntaxError("Answer ends with a lone backslash", i)
+                end += 1
+                if text[i + 1] not in SPACING_COMMANDS:
+                    tokens.append(Token("command", text[i + 1:end], i))
+            else:
+                tokens.append(Token("command", text[i + 1:end], i))
+            i = end
+        elif char.isdigit() or (char == "." and i + 1 < n and text[i + 1].isdigit()):
+            end = i + 1
+            while end < n and (text[end].isdigit() or text[end] == "."):
+                end += 1
+            tokens.append(Token("number", text[i:end], i))
+            i = end
+        elif char.isalpha():
+            tokens.append(Token("letter", char, i))
+            i += 1
+        elif char in OPENING:
+            tokens.append(Token("open", char, i))
+            i += 1
+        elif char in CLOSING:
+            tokens.append(Token("close", char, i))
+            i += 1
+        elif char in OPERATORS:
+            tokens.append(Token("operator", char, i))
+            i += 1
+        else:
+            raise LaTeXSyntaxError(f"Unexpected character '{char}'", i)
+    return tokens
+
+
+def validate_latex(text):
+    """Check that a LaTeX answer is structurally plausible.
+
+    Runs in time linear in the length of the input. Passing validation does
+    not guarantee that ``parse_latex`` accepts the input, but it catches the
+    common mistakes with a precise position.
+
+    Args:
+        text (str): The answer in LaTeX format.
+
+    Returns:
+        list: The tokens of the answer.
+
+    Raises:
+        LaTeXSyntaxError: If the answer is malformed.
+    """
+    tokens = tokenize(text)
+    checker = _Checker()
+    for token in tokens:
+        checker.feed(token)
+    checker.finish()
+    return tokens
+
+
+class IncrementalValidator:
+    """Validates successive versions of an answer while it is being typed.
+
+    Keeps the tokens and checker state of the previous input, so each call
+    only re-lexes the text after the longest common prefix with the previous
+    input. Typing at the end of an answer therefore costs time proportional
+    to the change, not to the whole answer.
+    """
+
+    def __init__(self):
+        """Initialize the validator with an empty input."""
+        self._text = ""
+        self._tokens = []
+        self._states = []   # checker state after each token, parallel to _tokens
+
+    def validate(self, text):
+        """Validate a new version of the answer.
+
+        Args:
+            text (str): The current answer in LaTeX format.
+
+        Returns:
+            list: The tokens of the answer.
+
+        Raises:
+            LaTeXSyntaxError: If the answer is malformed.
+        """
+        common = 0
+        limit = min(len(text), len(self._text))
+        while common < limit and text[common] == self._text[common]:
+            common += 1
+
+        # Keep tokens that end strictly before the first changed character; a
+        # token ending right at it could continue, e.g. "\si" becoming "\sin".
+        keep = 0
+        while keep < len(self._tokens) and _token_end(self._text, self._tokens[keep]) < common:
+            keep += 1
+        del self._tokens[keep:]
+        del self._states[keep:]
+
+        self._text = text
+        checker = self._states[-1].copy() if self._states else _Checker()
+        start = _token_end(text, self._tokens[-1]) if self._tokens else 0
+        for token in tokenize(text, start):
+            checker.feed(token)
+            self._tokens.append(token)
+            self._states.append(checker.copy())
+        checker.finish()
+        return list(self._tokens)
+
+
+def _token_end(text, token):
+    """Find the index just past a token in the text it was read from.
+
+    Args:
+        text (str): The tokenized text.
+        token (Token): A token of that text.
+
+    Returns:
+        int: Index of the first character after the token.
+    """
+    if token.kind == "command":
+        return token.position + 1 + len(token.value)
+    return token.position + len(token.value)
+
+
+class _Checker:
+    """Incremental structural checks over a stream of tokens."""
+
+    def __init__(self):
+        """Initialize the checker for an empty answer."""
+        self.stack = []            # (bracket, position, role) for each open bracket
+        self.expect_group = None   # (command, position, role) when an argument group must come next
+        self.previous = None
+        self.letter_run = []
+
+    def copy(self):
+        """Return an independent copy of the checker state.
+
+        Returns:
+            _Checker: The copy.
+        """
+        other = _Checker()
+        other.stack = list(self.stack)
+        other.expect_group = self.expect_group
+        other.previous = self.previous
+        other.letter_run = list(self.letter_run)
+        return other
+
+    def feed(self, token):
+        """Check the next token.
+
+        Args:
+            token (Token): The next token of the answer.
+
+        Raises:
+            LaTeXSyntaxError: If the token makes the answer malformed.
+        """
+        kind, value, position = token
+        previous = self.previous
+
+        if kind == "letter":
+            self.letter_run.append(token)
+        else:
+            _check_letter_run(self.letter_run)
+            self.letter_run = []
+
+        group_role = None
+        if self.expect_group is not None:
+            command, command_position, group_role = self.expect_group
+            self.expect_group = None
+            if group_role == "sqrt" and value == "[":
+                group_role = "sqrt-index"
+            elif group_role in ("numerator", "denominator") and _is_digit_argument(kind, value, group_role):
+                # As in TeX, single digits need no braces: \frac12 is \frac{1}{2}
+                if group_role == "numerator" and len(value) == 1:
+                    self.expect_group = (command, command_position, "denominator")
+                group_role = None
+            elif value != "{":
+                expected = "a {...} group or a digit" if group_role in ("numerator", "denominator") else "a {...} group"
+                raise LaTeXSyntaxError(f"\\{command} must be followed by {expected}", command_position)
+
+        if kind == "command":
+            if value not in ALLOWED_COMMANDS:
+                raise LaTeXSyntaxError(f"Unknown command \\{value}", position)
+            if value in ("frac", "dfrac", "tfrac"):
+                self.expect_group = (value, position, "numerator")
+            elif value == "sqrt":
+                self.expect_group = (value, position, "sqrt")
+            elif value in ("left", "right"):
+                # Sizing prefixes for the bracket that follows, not values
+                return
+
+        elif kind == "open":
+            self.stack.append((value, position, group_role))
+
+        elif kind == "close":
+            if not self.stack:
+                raise LaTeXSyntaxError(f"Unmatched '{value}'", position)
+            opening, opening_position, role = self.stack.pop()
+            if OPENING[opening] != value:
+                raise LaTeXSyntaxError(
+                    f"'{opening}' at position {opening_position + 1} is closed by '{value}'", position)
+            if previous is not None and previous.kind == "open":
+                raise LaTeXSyntaxError("Empty brackets", opening_position)
+            if role == "numerator":
+                self.expect_group = ("frac", opening_position, "denominator")
+            elif role == "sqrt-index":
+                self.expect_group = ("sqrt", opening_position, "radicand")
+
+        elif kind == "operator":
+            if value == "-" and previous is not None and previous.value in ("^", "_"):
+                raise LaTeXSyntaxError("Put negative exponents in braces, e.g. x^{-1}", previous.position)
+            if value in BINARY_OPERATORS and (previous is None or previous.kind == "open"
+                                              or previous.value in BINARY_OPERATORS
+                                              or previous.value in ("+", "-")):
+                raise LaTeXSyntaxError(f"Missing value before '{value}'", position)
+
+        self.previous = token
+
+    def finish(self):
+        """Run the checks that need the whole answer.
+
+        Raises:
+            LaTeXSyntaxError: If the answer is incomplete.
+        """
+        _check_letter_run(self.letter_run)
+        if self.expect_group is not None:
+            command, command_position, role = self.expect_group
+            raise LaTeXSyntaxError(f"\\{command} is missing its {{...}} argument", command_position)
+        if self.stack:
+            opening, opening_position, role = self.stack[-1]
+            raise LaTeXSyntaxError(f"'{opening}' is never closed", opening_position)
+        previous = self.previous
+        if previous is not None and previous.value in TRAILING_OPERATORS:
+            raise LaTeXSyntaxError(f"Answer ends with '{previous.value}'", previous.position)
+
+
+def _is_digit_argument(kind, value, role):
+    """Check whether a number token supplies the next \\frac arguments as single digits.
+
+    Args:
+        kind (str): Kind of the token.
+        value (str): Text of the token.
+        role (str): "numerator" or "denominator", the argument expected next.
+
+    Returns:
+        bool: True if the token starts with a digit for each argument it
+            supplies: the numerator and, if the token goes on, the denominator.
+    """
+    if kind != "number" or not value[0].isdigit():
+        return False
+    return role == "denominator" or len(value) == 1 or value[1].isdigit()
+
+
+def _check_letter_run(letters):
+    """Reject runs of letters that look like typed words instead of math.
+
+    Args:
+        letters (list): Consecutive letter tokens.
+
+    Raises:
+        LaTeXSyntaxError: If the run spells a function name without its
+            backslash, or is long enough to be text.
+    """
+    if not letters:
+        return
+    word = "".join(token.value for token in letters)
+    position = letters[0].position
+    for name in FUNCTION_NAMES:
+        index = word.find(name)
+        if index != -1 and len(name) > 1:
+            raise LaTeXSyntaxError(f"Write \\{name} instead of {name}", letters[index].position)
+    if len(word) >= PROSE_MIN_LENGTH:
+        raise LaTeXSyntaxError("This looks like text, not a math expression", position)
@@ -1,11 +1,19 @@
 import time
-from sympy.parsing.latex import parse_latex, LaTeXParsingError
-from questions import QUESTIONS
+from questions import get_question
 import random
 import math
 from db import DatabaseManager
+from analysis import load_bank, get_strategy
+from lexer import LaTeXSyntaxError
+from verify import verify_answer
+from scheduler import AdaptiveScheduler, answer_outcome
+from review import ReviewQueue, answer_quality, record_review, GOOD_QUALITY
+from mixing import QuestionMixer, load_weights, validate_weights
 from PyQt5.QtWidgets import QMessageBox
 
+# Correct answers that end a game.
+GAME_LENGTH = 10
+
 
 class GameManager:
     """Manages the game logic and state for the math game.
@@ -17,28 +25,66 @@ class GameManager:
         gui (MainWindow): Reference to the main window GUI.
         db (DatabaseManager): Reference to the database manager.
         questions (dict): Dictionary of questions organized by subject and difficulty.
+        metadata (dict): Precomputed verification metadata keyed by question identifier.
+        current_question_id (str): Identifier of the currently displayed question.
+        current_question_difficulty (str): Difficulty of the currently displayed question.
         current_question (str): The currently displayed question in LaTeX format.
         correct_answer (str): The correct answer to the current question.
         selected_subjects (list): List of subjects selected by the player.
-        current_difficulty (str): Current difficulty level ("easy" or "hard").
+        current_difficulty (str): Current difficulty level ("easy", "hard", "mixed"
+            or "adaptive").
+        weights (dict): Subject and difficulty weights for drawing questions,
+            see ``mixing.load_weights``.
+        mixer (QuestionMixer): Draws questions for the current subjects,
+            difficulty and weights; None until needed after a setting changed.
+        player_name (str): Name of the player, asked for at the start of an adaptive game.
+        scheduler (AdaptiveScheduler): Chooses questions in adaptive games, created
+            when the first adaptive game starts.
+        wrong_attempts (int): Incorrect answers given to the current question.
+        review_queue (ReviewQueue): Questions left in the current review session,
+            or None outside review sessions.
+        pending_reviews (list): (question_id, quality) of misses and slow answers
+            waiting for the player's name, which is known once the score is saved.
+        journal (SessionJournal): Journal the game state is checkpointed to after
+            every change, or None to keep no journal.
+        recorder (SessionRecorder): Records the seed and events of each game
+            for replay, or None to record nothing.
+        seed (int): Seed of the current game's random number generator.
+        rng (random.Random): Source of all randomness in question selection,
+            seeded at the start of every game.
         current_points (int): Player's current score for this game session.
         questions_completed (int): Number of questions answered correctly in this session.
     """
     
-    def __init__(self, gui=None, db=None):
+    def __init__(self, gui=None, db=None, journal=None, recorder=None):
         """Initialize the game manager.
         
         Args:
             gui (MainWindow, optional): Reference to the main window GUI. Defaults to None.
             db (DatabaseManager, optional): Reference to the database manager. Defaults to None.
+            journal (SessionJournal, optional): Journal for crash recovery. Defaults to None.
+            recorder (SessionRecorder, optional): Recorder for replays. Defaults to None.
         """
         self.gui = gui
-        self.db = DatabaseManager()
-        self.questions = QUESTIONS
+        self.journal = journal
+        self.recorder = recorder
+        self.seed = None
+        self.rng = random.Random()
+        self.db = db if db is not None else DatabaseManager()
+        self.questions, self.metadata = load_bank()
+        self.current_question_id = None
+        self.current_question_difficulty = None
         self.current_question = None
         self.correct_answer = None
         self.selected_subjects = ["algebra"]  # Default
         self.current_difficulty = "easy" # Default value
+        self.weights = load_weights()
+        self.mixer = None
+        self.player_name = None
+        self.scheduler = None
+        self.wrong_attempts = 0
+        self.review_queue = None
+        self.pending_reviews = []
         self.current_points = 0
         self.questions_completed = 0
 
@@ -46,10 +92,13 @@ class GameManager:
         """Set the difficulty level for the game.
         
         Args:
-            difficulty (str or None): Difficulty level ("easy" or "hard").
+            difficulty (str or None): Difficulty level ("easy" or "hard"),
+                "mixed" to draw from every difficulty by weight, or "adaptive"
+                to choose questions matching the player's rating.
                 Can be None if no difficulty is selected.
         """
         self.current_difficulty = difficulty
+        self.mixer = None
         print(f"Difficulty set to: {difficulty}")
 
     def set_subjects(self, subjects):
@@ -60,19 +109,122 @@ class GameManager:
                 Can be an empty list if no subjects are selected.
         """
         self.selected_subjects = subjects
+        self.mixer = None
         print(f"Selected subjects: {subjects}")
 
-    def start_game(self):
+    def set_weights(self, weights):
+        """Set the subject and difficulty weights for drawing questions.
+
+        Args:
+            weights (dict): Weights as described in ``mixing``.
+
+        Raises:
+            ValueError: If the weights are invalid.
+        """
+        self.weights = validate_weights(weights)
+        self.mixer = None
+
+    def start_game(self, seed=None):
         """Start a new game and initialize game state.
         
         Enables UI components for gameplay while disabling menu options that
         shouldn't be changed during an active game. Loads the first question.
-        
-        Note:
-            Currently does not reset points or questions_completed counters.
-            This should be addressed in future updates.
+        An adaptive game first asks for the player's name, since ratings are
+        kept per player.
+
+        Args:
+            seed (int, optional): Seed for the game's question selection, to
+                repeat a recorded game. Defaults to a random seed.
         """
+        if self.current_difficulty == "adaptive" and not self._prepare_scheduler():
+            return
+        self.review_queue = None
         print("Game started")
+        self._begin_game(seed)
+
+    def start_review(self):
+        """Start a review session of the player's missed and slow questions.
+
+        Asks for the player's name and loads the questions that are due for
+        review. The session ends when they have all been answered or skipped.
+        """
+        if self.gui:
+            name = self.gui.ask_player_name("Review", "Name:", self.player_name or "")
+            if name is None:
+                return
+            self.player_name = name
+        if not self.player_name:
+            print("Review sessions need a player name!")
+            return
+        queue = ReviewQueue(self.db, self.player_name)
+        if not queue:
+            if self.gui:
+                QMessageBox.information(self.gui, "Review", "Nothing is due for review. Well done!")
+            print(f"Nothing due for review for {self.player_name}")
+            return
+        self.review_queue = queue
+        print(f"Review started: {len(queue)} questions due")
+        self._begin_game()
+
+    def _begin_game(self, seed=None):
+        """Reset the score, seed the game, start recording it, enable the controls and load the first question.
+
+        Games and review sessions both start from zero points and zero
+        completed questions.
+
+        Args:
+            seed (int, optional): Seed for the question selection. Defaults to
+                a random seed.
+        """
+        self.pending_reviews = []
+        self.current_points = 0
+        self.questions_completed = 0
+        self.update_points(0)
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.rng.seed(self.seed)
+        if self.recorder is not None and self.review_queue is None:
+            self.recorder.start(self._recording_header())
+        self._enable_game_controls()
+        self.next_question()
+
+    def _recording_header(self):
+        """Describe the seed and starting state of a game for its recording.
+
+        Returns:
+            dict: Everything a replay needs to start the game the same way,
+                including the ratings an adaptive game starts from.
+        """
+        header = {
+            "seed": self.seed,
+            "difficulty": self.current_difficulty,
+            "subjects": list(self.selected_subjects),
+            "player": self.player_name,
+            "points": self.current_points,
+            "completed": self.questions_completed,
+            "weights": self.weights,
+        }
+        if self.current_difficulty == "adaptive":
+            scheduler = self.scheduler
+            header["ratings"] = {
+                "player": [scheduler.player_rating, scheduler.player_answers, scheduler.average_time],
+                "questions": {qid: [scheduler.ratings[qid], attempts]
+                              for qid, attempts in scheduler.attempts.items() if attempts},
+                "recent": list(scheduler.recent),
+            }
+        return header
+
+    def _record_event(self, kind, **fields):
+        """Record a game event if the game is being recorded.
+
+        Returns:
+            dict or None: The recorded event, see SessionRecorder.event.
+        """
+        if self.recorder is None:
+            return None
+        return self.recorder.event(kind, **fields)
+
+    def _enable_game_controls(self):
+        """Enable the answer controls and lock the menus for a running game."""
         if self.gui:
             self.gui.questionWidget.setEnabled(True)
             self.gui.answerInput.setEnabled(True)
@@ -82,56 +234,226 @@ class GameManager:
             self.gui.subjectMenu.setEnabled(False)
             self.gui.startGameMenu.setEnabled(False)
             self.gui.seeScoresMenu.setEnabled(False)
+            self.gui.reviewMenu.setEnabled(False)
             self.gui.endGameMenu.setEnabled(True)
-            
-        self.next_question()
+
+    def _prepare_scheduler(self):
+        """Make sure the adaptive scheduler is loaded for the current player.
+
+        Returns:
+            bool: True if the scheduler is ready, False if no player name was given.
+        """
+        if self.gui:
+            name = self.gui.ask_player_name("Adaptive Game", "Name:", self.player_name or "")
+            if name is None:
+                return False
+            self.player_name = name
+        if not self.player_name:
+            print("Adaptive games need a player name!")
+            return False
+        if self.scheduler is None or self.scheduler.player_name != self.player_name:
+            self.scheduler = AdaptiveScheduler(self.db, self.player_name, self.questions, self.rng)
+        return True
 
     def next_question(self):
         """Load and display the next question from selected subjects.
         
-        Randomly selects a subject from the player's chosen subjects, then picks
-        a random question at the current difficulty level. Updates the GUI with
-        the new question and starts the timer.
+        Draws a subject and difficulty from the player's chosen subjects and
+        the current difficulty level by their weights, then picks a random
+        question from that pool, using the game's seeded random number
+        generator. In adaptive games the
+        scheduler picks a question matching the player's rating instead. Updates
+        the GUI with the new question and starts the timer.
         
         Returns:
             None: Returns early if no subjects are selected.
         """
         
-        if not self.selected_subjects:
+        if not self.selected_subjects and self.review_queue is None:
             print("No subjects selected!")
             return
             
-        # Pick a random subject from selected ones
-        subject = random.choice(self.selected_subjects)
-        
-        difficulty = self.current_difficulty
-        
-        # Pick a random question
-        questions_list = self.questions[subject][difficulty]
-        question_data = random.choice(questions_list)
-        
-        self.current_question = question_data["question"]
-        self.correct_answer = question_data["answer"]
+        if self.review_queue is not None:
+            qid, question = self._next_review()
+            if qid is None:
+                self.finish_game()
+                return
+            subject, difficulty, question_data = question
+        elif self.current_difficulty == "adaptive":
+            qid = self.scheduler.choose(self.selected_subjects)
+            if qid is None:
+                print("No questions for the selected subjects!")
+                return
+            subject, difficulty, question_data = get_question(qid, self.questions)
+        else:
+            if self.mixer is None and not self._build_mixer():
+                return
+            subject, difficulty, index = self.mixer.draw(self.rng)
+            question_data = self.questions[subject][difficulty][index]
+            qid = question_data.id
+
+        self.wrong_attempts = 0
+        self._show_question(qid, difficulty, question_data)
+
+    def _build_mixer(self):
+        """Build the question mixer for the current subjects, difficulty and weights.
+
+        Returns:
+            bool: True if the mixer is ready, False if there is nothing to draw.
+        """
+        if self.current_difficulty == "mixed":
+            difficulties = sorted({difficulty for levels in self.questions.values() for difficulty in levels})
+        else:
+            difficulties = [self.current_difficulty]
+        try:
+            self.mixer = QuestionMixer(self.questions, self.selected_subjects, difficulties, self.weights)
+        except ValueError as e:
+            print(f"Cannot draw questions: {e}")
+            return False
+        return True
+
+    def _show_question(self, qid, difficulty, question_data):
+        """Make a question the current one, display it and checkpoint the game.
+
+        Args:
+            qid (str): Identifier of the question.
+            difficulty (str): Difficulty of the question.
+            question_data (QuestionRecord): The question and its answer.
+        """
+        self.current_question_id = qid
+        self.current_question_difficulty = difficulty
+        self.current_question = question_data.question
+        self.correct_answer = question_data.answer
+        self._record_event("question", id=qid)
         
         if self.gui:
             self.gui.update_question_display(self.current_question)
             self.gui.answerInput.clear()
             self.gui._startTimer()
+        self._checkpoint()
+
+    def _checkpoint(self):
+        """Record the game state in the journal, if there is one.
+
+        Review sessions are not journaled, since they are short practice
+        rounds whose progress is already kept in the review schedule.
+        """
+        if self.journal is None or self.review_queue is not None:
+            return
+        self.journal.record({
+            "points": self.current_points,
+            "completed": self.questions_completed,
+            "question": self.current_question_id,
+            "wrong": self.wrong_attempts,
+            "difficulty": self.current_difficulty,
+            "subjects": list(self.selected_subjects),
+            "weights": self.weights,
+            "player": self.player_name,
+            "pending": list(self.pending_reviews),
+        })
+
+    def resume(self, snapshot, seed=None):
+        """Continue a game from a journal snapshot.
+
+        The game continues with the settings and mixing weights it was
+        started with, whatever ``mixing.json`` holds now. The rest of the
+        game is recorded as a game starting at the resumed
+        question.
+
+        Args:
+            snapshot (dict): Snapshot as returned by ``SessionJournal.load``.
+            seed (int, optional): Seed for the rest of the game, to repeat a
+                recording. Defaults to a random seed.
+
+        Returns:
+            bool: True if the game was resumed, False if the snapshot does not
+                fit the current question bank.
+        """
+        try:
+            qid = snapshot["question"]
+            subject, difficulty, question_data = get_question(qid, self.questions)
+            self.current_difficulty = snapshot["difficulty"]
+            self.selected_subjects = list(snapshot["subjects"])
+            self.weights = validate_weights(snapshot["weights"])
+            self.mixer = None
+            self.player_name = snapshot["player"]
+            self.current_points = int(snapshot["points"])
+            self.questions_completed = int(snapshot["completed"])
+            self.wrong_attempts = int(snapshot["wrong"])
+            self.pending_reviews = [tuple(item) for item in snapshot["pending"]]
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Could not resume game: {e}")
+            return False
+        if self.current_difficulty == "adaptive":
+            if not self.player_name:
+                print("Could not resume game: adaptive game without a player name")
+                return False
+            if self.scheduler is None or self.scheduler.player_name != self.player_name:
+                self.scheduler = AdaptiveScheduler(self.db, self.player_name, self.questions, self.rng)
+        self.review_queue = None
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.rng.seed(self.seed)
+        if self.recorder is not None:
+            self.recorder.start(dict(self._recording_header(), question=qid, wrong=self.wrong_attempts))
+        print(f"Game resumed at {self.questions_completed} questions and {self.current_points} points")
+        self._enable_game_controls()
+        self.update_points(0)
+        self._show_question(qid, difficulty, question_data)
+        return True
+
+    def _next_review(self):
+        """Take the next question of the review session from the queue.
+
+        Questions that are no longer in the question bank are skipped.
+
+        Returns:
+            tuple: (question_id, (subject, difficulty, question_data)), or
+                (None, None) when the session is over.
+        """
+        while True:
+            qid = self.review_queue.pop()
+            if qid is None:
+                return None, None
+            try:
+                return qid, get_question(qid, self.questions)
+            except KeyError:
+                print(f"Skipping review of unknown question {qid}")
+
+    def _record_review(self, correct, elapsed_time=0.0):
+        """Schedule the current question for review depending on how it went.
+
+        Args:
+            correct (bool): False if the question was skipped.
+            elapsed_time (float, optional): Time taken to answer in seconds.
+        """
+        qid = self.current_question_id
+        quality = answer_quality(correct, elapsed_time, self.wrong_attempts)
+        if self.review_queue is not None:
+            record_review(self.db, self.player_name, qid, quality, self.review_queue.states.get(qid))
+        elif self.player_name:
+            record_review(self.db, self.player_name, qid, quality)
+        elif quality < GOOD_QUALITY:
+            self.pending_reviews.append((qid, quality))
 
     def check_answer(self, answer, elapsed_time):
         """Check the user's answer against the correct answer.
         
-        Parses both the user's answer and the correct answer from LaTeX format
-        and compares them. If correct, calculates points and loads the next question.
+        The answer is verified by ``verify.verify_answer`` with the strategy
+        precomputed for the current question: known spellings and forms of the
+        correct answer are accepted by lookup, anything else is validated,
+        parsed and compared symbolically. If correct, calculates points and
+        loads the next question.
         If incorrect, restarts the timer for another attempt.
         
         Args:
             answer (str): The user's answer in LaTeX format.
-            elapsed_time (int): Time taken to answer in seconds.
+            elapsed_time (float): Time taken to answer in seconds.
             
         Returns:
             bool: True if the answer is correct, False otherwise.
         """
+        event = self._record_event("answer", answer=answer, elapsed=elapsed_time)
+
         # Validate input is not empty or whitespace
         if not answer or answer.isspace():
             if self.gui:
@@ -140,53 +462,80 @@ class GameManager:
                     "Empty Answer", 
                     "Please enter an answer before submitting."
                 )
+                self.gui._restart_timer()
             return False
         
-        # Parse LaTeX expressions
+        entry = self.metadata.get(self.current_question_id, {})
+        strategy, timeout = get_strategy(self.metadata, self.current_question_id, self.current_question)
         try:
-            parsed_answer = parse_latex(answer)
-            parsed_correct = parse_latex(self.correct_answer)
-        except LaTeXParsingError as e:
+            verify_start = time.perf_counter()
+            is_correct = verify_answer(answer, self.correct_answer, entry, strategy, timeout)
+            verify_ms = (time.perf_counter() - verify_start) * 1000
+        except LaTeXSyntaxError as e:
             if self.gui:
                 QMessageBox.critical(
                     self.gui,
                     "Invalid Input",
-                    f"Could not parse answer as LaTeX.\nError: {str(e)}\n\nPlease check your syntax."
+                    f"{e.describe(answer)}\n\nPlease check your syntax."
                 )
+                self.gui._restart_timer()
+            print(f"Invalid answer {answer!r}: {e}")
             return False
         except Exception as e:
-            # Catch any other unexpected parsing errors
+            # parse_latex raises LaTeXParsingError, and other errors for some inputs
             if self.gui:
                 QMessageBox.critical(
                     self.gui,
-                    "Parsing Error",
-                    f"Unexpected error while parsing: {str(e)}"
+                    "Invalid Input",
+                    f"Could not parse answer as LaTeX.\nError: {str(e)}\n\nPlease check your syntax."
                 )
-            print(f"Unexpected parsing error: {e}")
+                self.gui._restart_timer()
+            print(f"Parsing error: {e}")
             return False
-        
-        # Compare answers
-        is_correct = parsed_answer == parsed_correct
-        
-        print(f"User answer: {answer} -> {parsed_answer}")
-        print(f"Correct answer: {self.correct_answer} -> {parsed_correct}")
-        print(f"Time taken: {elapsed_time} seconds")
+
+        print(f"User answer: {answer}")
+        print(f"Correct answer: {self.correct_answer}")
+        print(f"Verification strategy: {strategy} (budget {timeout}s)")
+        print(f"Time taken: {elapsed_time:.3f} seconds")
         print(f"Result: {'Correct!' if is_correct else 'Incorrect'}")
+        if event is not None:
+            event.update(correct=is_correct, verify_ms=round(verify_ms, 3))
+
+        if is_correct and self.current_difficulty == "adaptive" and self.review_queue is None:
+            outcome = answer_outcome(True, elapsed_time, self.scheduler.average_time, self.wrong_attempts)
+            self.scheduler.record(self.current_question_id, outcome, elapsed_time)
+            print(f"Rating: {self.scheduler.player_rating:.0f} (outcome {outcome:.2f})")
 
         if is_correct:
-            self.calculate_points(elapsed_time, self.current_difficulty)
+            self._record_review(True, elapsed_time)
+            self.calculate_points(elapsed_time, self.current_question_difficulty)
             self.questions_completed += 1
-            if self.questions_completed >= 10:
+            if self.questions_completed >= GAME_LENGTH and self.review_queue is None:
                 self.finish_game()
             else:
                 self.next_question()
         else:
+            self.wrong_attempts += 1
+            self._checkpoint()
             if self.gui:
-                self.gui._restart_timer(elapsed_time)
+                self.gui._restart_timer()
                 self.gui.answerInput.clear()
         
         return is_correct
     
+    def skip_question(self):
+        """Skip the current question and load the next one.
+
+        In adaptive games a skip counts as a failed answer for the ratings.
+        Skipped questions are scheduled for review.
+        """
+        self._record_event("skip")
+        if self.current_question_id is not None:
+            if self.current_difficulty == "adaptive" and self.review_queue is None:
+                self.scheduler.record(self.current_question_id, answer_outcome(False, 0, None))
+            self._record_review(False)
+        self.next_question()
+
     def calculate_points(self, elapsed_time, difficulty):
         """Calculate points earned for a correct answer based on time and difficulty.
         
@@ -195,10 +544,11 @@ class GameManager:
         by exp(-0.1 * elapsed_time).
         
         Args:
-            elapsed_time (int): Time taken to answer in seconds.
+            elapsed_time (float): Time taken to answer in seconds, with
+                sub-second resolution.
             difficulty (str): Question difficulty level ("easy" or "hard").
         """
-        print(f"Updating points for difficulty: {difficulty}, time: {elapsed_time}s")
+        print(f"Updating points for difficulty: {difficulty}, time: {elapsed_time:.3f}s")
         base_easy = 50
         base_hard = 100
         k = 0.1
@@ -208,7 +558,7 @@ class GameManager:
         if difficulty == "hard":
             points = base_hard * multiplier
         points = int(points) # Round to whole number
-        print(f"Points for this question: {points}, with difficulty: {difficulty} and time: {elapsed_time}")
+        print(f"Points for this question: {points}, with difficulty: {difficulty} and time: {elapsed_time:.3f}s")
         self.update_points(points)
     
     def update_points(self, points):
@@ -225,8 +575,18 @@ class GameManager:
         """End the current game session and optionally save the score.
         
         Disables game UI elements, re-enables menu options, stops the timer,
-        and prompts the player to save their score to the database.
+        and prompts the player to save their score to the database. Review
+        sessions are practice, so their score is not saved.
         """
+        reviewing = self.review_queue is not None
+        self.review_queue = None
+        if self.journal is not None:
+            self.journal.clear()
+        if self.recorder is not None and not reviewing:
+            self._record_event("finish", points=self.current_points, completed=self.questions_completed)
+            path = self.recorder.save()
+            if path:
+                print(f"Game recorded to {path} (seed {self.seed})")
         if self.gui:
             self.gui.questionWidget.setEnabled(False)
             self.gui.answerInput.setEnabled(False)
@@ -236,9 +596,13 @@ class GameManager:
             self.gui.subjectMenu.setEnabled(True)
             self.gui.startGameMenu.setEnabled(True)
             self.gui.seeScoresMenu.setEnabled(True)
+            self.gui.reviewMenu.setEnabled(True)
             self.gui.endGameMenu.setEnabled(False)
             self.gui._stopTimer()
-            self.gui.show_save_score_dialog()
+            if reviewing:
+                QMessageBox.information(self.gui, "Review", "Review session finished.")
+            else:
+                self.gui.show_save_score_dialog()
 
             
         
@@ -247,7 +611,8 @@ class GameManager:
         
         Converts the list of selected subjects to a comma-separated string and
         attempts to save the score to the database. If the save fails, displays
-        a warning dialog to the user via the GUI.
+        a warning dialog to the user via the GUI. Questions the player missed or
+        answered slowly during the game are added to their review list.
         
         Args:
             player_name (str): The name of the player.
@@ -265,6 +630,9 @@ class GameManager:
                     "Save Failed",
                     "Could not save score to database. Please try again."
                     )
+        for qid, quality in self.pending_reviews:
+            record_review(self.db, player_name, qid, quality)
+        self.pending_reviews = []
                 
     def get_scores(self):
         """Retrieve all scores from the database.
@@ -278,6 +646,33 @@ class GameManager:
         scores = self.db.get_scores()
         return scores
     
+    def get_top_scores(self, board="all"):
+        """Retrieve the first page of a leaderboard.
+
+        Delegates to the database manager, which reads the maintained
+        leaderboard table instead of sorting all scores.
+
+        Args:
+            board (str, optional): Leaderboard name, see DatabaseManager.get_top_scores.
+                Defaults to "all".
+
+        Returns:
+            list: List of tuples containing score data (name, score, difficulty, subject, date).
+                Returns empty list if database error occurs.
+        """
+        return self.db.get_top_scores(board)
+
+    def get_player_rank(self, player_name):
+        """Look up a player's rank by best score.
+
+        Args:
+            player_name (str): The name of the player.
+
+        Returns:
+            tuple or None: (rank, best_score), or None if the player has no scores.
+        """
+        return self.db.get_player_rank(player_name)
+
     def init_db(self):
         """Initialize the database by creating required tables.
         
@@ -1,26 +1,95 @@
 """Main entry point for the math game application.
 
 This module initializes the PyQt5 application and creates the main window.
+Command-line tools are started with ``mathgame <command>``; see COMMANDS.
 """
 
 import sys
 import os
-from PyQt5.QtWidgets import QApplication
-from gui import MainWindow
-from logic import GameManager
+import json
+import time
+import argparse
+import importlib
 
-def main():
+# The game's modules import each other by their bare names, as when main.py
+# is run from this directory. The installed ``mathgame`` script imports this
+# module as ``app.main``, so their directory has to be on the path.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+# Command-line tools, mapped to the module whose main(argv) implements them.
+COMMANDS = {
+    "build-bank": "build_bank",
+    "build-resources": "resources",
+    "grade": "grade",
+    "replay": "replay",
+    "scores": "scoreio",
+    "simulate": "simulate",
+    "startup-report": "diagnostics",
+}
+
+def main(argv=None):
     """Initialize and run the math game application.
     
     Creates the QApplication instance, initializes the main window,
-    and starts the Qt event loop.
+    and starts the Qt event loop. If the first argument names one of
+    COMMANDS, runs that command-line tool instead.
+
+    With ``--lite`` questions are rendered with native widgets and
+    QtWebEngine is never imported. The default mode falls back to lite
+    mode when QtWebEngine is not installed. ``--memory-report`` prints the
+    memory use by subsystem when the game quits.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
     """
+    started = time.perf_counter()
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        command = importlib.import_module(COMMANDS[argv[0]])
+        sys.exit(command.main(argv[1:]))
 
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(prog="mathgame", description="LaTeX math game.")
+    parser.add_argument("--lite", action="store_true",
+                        help="render with native widgets only, without QtWebEngine")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print startup time and memory use as JSON once the window is shown, then quit")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="trace memory use and print it by subsystem on exit")
+    # Arguments left over are Qt's own, such as -platform
+    args, qt_args = parser.parse_known_args(argv)
+    if args.memory_report:
+        import diagnostics
+        diagnostics.start_memory_tracing()
+
+    lite = args.lite
+    if not lite:
+        # QtWebEngine has to be imported before the QApplication is created
+        try:
+            import PyQt5.QtWebEngineWidgets  # noqa: F401
+        except ImportError as e:
+            print(f"Warning: QtWebEngine is not available ({e}), starting in lite mode")
+            lite = True
+
+    # Imported here so command-line tools start without loading Qt
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    from gui import MainWindow
+    from logic import GameManager
+
+    app = QApplication(sys.argv[:1] + qt_args)
     apply_stylesheet(app)
 
-    window = MainWindow()
+    if args.memory_report:
+        app.aboutToQuit.connect(diagnostics.print_memory_report)
+
+    window = MainWindow(lite=lite)
     window.show()
+    if args.startup_report:
+        QTimer.singleShot(0, lambda: _report_startup(app, started, lite))
+    else:
+        window.offer_resume()
 
     logic = GameManager()
     logic.init_db()
@@ -28,27 +97,47 @@ def main():
     sys.exit(app.exec_())
 
 
+def _report_startup(app, started, lite):
+    """Print the startup report once the window is shown, then quit.
+
+    Called from the first pass of the event loop. Memory is measured
+    after diagnostics.SETTLE_MS, when QtWebEngine's processes have started.
+
+    Args:
+        app (QApplication): The running application.
+        started (float): ``time.perf_counter()`` when main() was entered.
+        lite (bool): True if the game runs in lite mode.
+    """
+    from PyQt5.QtCore import QTimer
+    import diagnostics
+
+    window_shown = time.perf_counter()
+
+    def report():
+        print(json.dumps(diagnostics.startup_report(started, window_shown, lite)), flush=True)
+        app.quit()
+
+    QTimer.singleShot(diagnostics.SETTLE_MS, report)
+
+
 
 def apply_stylesheet(app, filename="style.qss"):
     """Apply QSS stylesheet to the application.
     
-    Loads and applies a QSS stylesheet from the same directory as main.py.
+    Loads the stylesheet from the packed resource archive, or from the
+    file next to main.py if the archive has not been built.
     Prints a warning if the file is not found but continues execution.
     
     Args:
         app (QApplication): The application instance to apply the stylesheet to.
-        filename (str): Name of the stylesheet file. Defaults to "style.qss".
+        filename (str): Name of the stylesheet resource. Defaults to "style.qss".
     """
+    from resources import read_resource
 
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-
-    style_path = os.path.join(script_dir, filename)
-    
     try:
-        with open(style_path, "r") as f:
-            app.setStyleSheet(f.read())
+        app.setStyleSheet(read_resource(filename).decode("utf-8"))
     except FileNotFoundError:
-        print(f"Warning: Could not find stylesheet at {style_path}")
+        print(f"Warning: Could not find stylesheet {filename}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+"""Weighted mixing of subjects and difficulties.
+
+A game draws from pools of questions, one per selected subject and
+difficulty. Each pool gets the weight of its subject times the weight of
+its difficulty, optionally times its number of questions, so a teacher can
+make one subject come up more often or mix easy and hard questions in a
+"mixed" game. Weights are read from ``mixing.json``::
+
+    {
+        "subjects": {"algebra": 2, "equations": 1, "calculus": 1},
+        "difficulties": {"easy": 3, "hard": 1},
+        "by_size": false
+    }
+
+Missing subjects and difficulties weigh 1. With ``by_size`` every question
+is equally likely rather than every pool.
+
+Pools are drawn from an alias table (Vose's method), which is built once
+when the settings change and then draws in constant time however many
+pools are active.
+"""
+
+import json
+
+# Default weights file, next to the score database.
+WEIGHTS_PATH = "mixing.json"
+
+DEFAULT_WEIGHTS = {"subjects": {}, "difficulties": {}, "by_size": False}
+
+
+class AliasTable:
+    """Draws items with fixed weights in constant time.
+
+    Attributes:
+        items (list): The items, in the order they were given.
+    """
+
+    def __init__(self, items, weights):
+        """Build the table.
+
+        Args:
+            items (list): Items to draw.
+            weights (list): Non-negative weight of each item.
+
+        Raises:
+            ValueError: If there are no items with a positive weight, or a
+                weight is negative.
+        """
+        if len(items) != len(weights):
+            raise ValueError("Every item needs a weight")
+        if any(weight < 0 for weight in weights):
+            raise ValueError("Weights cannot be negative")
+        total = sum(weights)
+        if not items or total <= 0:
+            raise ValueError("Nothing to draw: no item has a positive weight")
+
+        count = len(items)
+        self.items = list(items)
+        self._probability = [1.0] * count
+        self._alias = list(range(count))
+        scaled = [weight * count / total for weight in weights]
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        # Each small column is topped up from a large one, which shrinks
+        while small and large:
+            low = small.pop()
+            high = large[-1]
+            self._probability[low] = scaled[low]
+            self._alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            if scaled[high] < 1.0:
+                small.append(large.pop())
+        # Whatever is left is full up to rounding errors
+
+    def __len__(self):
+        """Return the number of items."""
+        return len(self.items)
+
+    def draw(self, rng):
+        """Draw an item.
+
+        Args:
+            rng (random.Random): Source of randomness.
+
+        Returns:
+            The drawn item.
+        """
+        column = rng.randrange(len(self.items))
+        if rng.random() < self._probability[column]:
+            return self.items[column]
+        return self.items[self._alias[column]]
+
+
+def load_weights(path=WEIGHTS_PATH):
+    """Load the mixing weights.
+
+    Prints a warning and uses equal weights if the file is invalid. A
+    missing file silently means equal weights.
+
+    Args:
+        path (str, optional): Weights file. Defaults to WEIGHTS_PATH.
+
+    Returns:
+        dict: "subjects" and "difficulties", mapping names to weights, and "by_size".
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            weights = json.load(f)
+        return validate_weights(weights)
+    except FileNotFoundError:
+        pass
+    except ValueError as e:
+        print(f"Warning: Invalid mixing weights in {path}: {e}")
+    return validate_weights({})
+
+
+def validate_weights(weights):
+    """Check weights read from a file or a recording.
+
+    Args:
+        weights (dict): Weights as described in the module docstring.
+
+    Returns:
+        dict: A copy of the weights, with missing keys filled in, that shares
+            no tables with the given weights or DEFAULT_WEIGHTS.
+
+    Raises:
+        ValueError: If the weights are not numbers of at least 0, or
+            "by_size" is not true or false.
+    """
+    if not isinstance(weights, dict):
+        raise ValueError("expected a JSON object")
+    result = dict(DEFAULT_WEIGHTS, **weights)
+    for key in ("subjects", "difficulties"):
+        table = result[key]
+        if not isinstance(table, dict):
+            raise ValueError(f"'{key}' must map names to weights")
+        for name, weight in table.items():
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+                raise ValueError(f"weight of {name} must be a number of at least 0, not {weight!r}")
+        result[key] = dict(table)
+    if not isinstance(result["by_size"], bool):
+        raise ValueError(f"'by_size' must be true or false, not {result['by_size']!r}")
+    return result
+
+
+class QuestionMixer:
+    """Draws questions from the selected subjects and difficulties by weight.
+
+    Attributes:
+        pools (AliasTable): Table of (subject, difficulty) pools.
+    """
+
+    def __init__(self, questions, subjects, difficulties, weights=DEFAULT_WEIGHTS):
+        """Build the alias table over the selected pools.
+
+        Args:
+            questions (dict): Question bank organized by subject and difficulty.
+            subjects (list): Selected subjects.
+            difficulties (list): Difficulties to mix.
+            weights (dict, optional): Weights, see load_weights. Defaults to
+                equal weights.
+
+        Raises:
+            ValueError: If no selected pool has questions and a positive weight.
+        """
+        self._questions = questions
+        pools = []
+        pool_weights = []
+        for subject in subjects:
+            for difficulty in difficulties:
+                size = len(questions.get(subject, {}).get(difficulty, ()))
+                weight = weights["subjects"].get(subject, 1) * weights["difficulties"].get(difficulty, 1)
+                if size and weight > 0:
+                    pools.append((subject, difficulty))
+                    pool_weights.append(weight * size if weights["by_size"] else weight)
+        self.pools = AliasTable(pools, pool_weights)
+
+    def draw(self, rng):
+        """Draw a question.
+
+        Args:
+            rng (random.Random): Source of randomness.
+
+        Returns:
+            tuple: (subject, difficulty, index) of the question.
+        """
+        subject, difficulty = self.pools.draw(rng)
+        return subject, difficulty, rng.randrange(len(self._questions[subject][difficulty]))
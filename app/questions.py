@@ -1,3 +1,6 @@
+import hashlib
+import sys
+
 QUESTIONS = {
     "algebra": {
         "easy": [
@@ -75,9 +78,9 @@ QUESTIONS = {
         ],
         "hard": [
             {"question": r"Solve: 3x - 2 = x + 4", "answer": r"x = 3"},
-            {"question": r"Solve: 2(x-4) = 3(x+2)", "answer": r"x = -16"},
+            {"question": r"Solve: 2(x-4) = 3(x+2)", "answer": r"x = -14"},
             {"question": r"Solve: \frac{x+3}{2} = \frac{x-5}{3}", "answer": r"x = -19"},
-            {"question": r"Solve: 4x - 7 = 2(3x+1)", "answer": r"x = -9"},
+            {"question": r"Solve: 4x - 7 = 2(3x+1)", "answer": r"x = -\frac{9}{2}"},
             {"question": r"Solve: x^2 - 5x + 6=0", "answer": r"x = 2,\; 3"},
             {"question": r"Solve: 2x^2 - 8x = 0", "answer": r"x = 0,\; 4"},
             {"question": r"Solve: x^2 = 5x", "answer": r"x = 0,\; 5"},
@@ -145,3 +148,152 @@ QUESTIONS = {
         ]
     }
 }
+
+
+# Question prefixes, before the colon, and the kind of question they ask.
+QUESTION_KINDS = {
+    "Simplify": "simplify",
+    "Expand": "expand",
+    "Factor": "factor",
+    "Factor completely": "factor",
+    "Differentiate": "derivative",
+    "Solve": "solve",
+}
+
+
+def question_kind(question):
+    """Work out what a question asks for from its prefix.
+
+    Args:
+        question (str): The question, such as "Expand: (x+2)(x+3)".
+
+    Returns:
+        tuple: (kind, expression), where kind is one of the values of
+            QUESTION_KINDS, or None for an unknown prefix, and expression is
+            the LaTeX after the colon.
+    """
+    prefix, _, expression = question.partition(":")
+    return QUESTION_KINDS.get(prefix.strip()), expression.strip()
+
+
+def question_id(subject, difficulty, question):
+    """Build the stable identifier used to refer to a single question.
+
+    The identifier names a question by a hash of its text, not by its
+    position, so ratings, review items, recordings and journal snapshots
+    keep referring to the same question when others are added, removed or
+    reordered. Rewording a question makes it a new question.
+
+    Args:
+        subject (str): Subject key in QUESTIONS (e.g. "algebra").
+        difficulty (str): Difficulty key ("easy" or "hard").
+        question (str): The question in LaTeX format.
+
+    Returns:
+        str: Identifier of the form "subject/difficulty/hash", where hash is
+            the first 8 hex digits of the SHA-1 of the question.
+    """
+    digest = hashlib.sha1(question.encode("utf-8")).hexdigest()[:8]
+    return f"{subject}/{difficulty}/{digest}"
+
+
+class QuestionRecord:
+    """A question of the loaded bank.
+
+    The game keeps the bank as records rather than dicts: slots leave out
+    the per-instance dict, and the subject, difficulty and identifier are
+    interned, so every record of a subject shares one string and the
+    identifier is the same object as the key of its metadata.
+
+    Attributes:
+        id (str): Identifier of the form "subject/difficulty/hash", see question_id.
+        subject (str): Subject key, such as "algebra".
+        difficulty (str): Difficulty key, "easy" or "hard".
+        question (str): The question in LaTeX format.
+        answer (str): The correct answer in LaTeX format.
+    """
+
+    __slots__ = ("id", "subject", "difficulty", "question", "answer")
+
+    def __init__(self, subject, difficulty, question, answer):
+        """Create a record.
+
+        Args:
+            subject (str): Subject key.
+            difficulty (str): Difficulty key.
+            question (str): The question in LaTeX format.
+            answer (str): The correct answer in LaTeX format.
+        """
+        self.subject = sys.intern(subject)
+        self.difficulty = sys.intern(difficulty)
+        self.id = sys.intern(question_id(subject, difficulty, question))
+        self.question = question
+        self.answer = answer
+
+    def __repr__(self):
+        return f"QuestionRecord({self.id!r}, {self.question!r}, {self.answer!r})"
+
+
+def compact_bank(questions=QUESTIONS):
+    """Turn a question bank of dicts into one of QuestionRecords.
+
+    Args:
+        questions (dict, optional): Question bank organized by subject and
+            difficulty, with a dict for each question. Defaults to QUESTIONS.
+
+    Returns:
+        dict: The same bank with a QuestionRecord for each question.
+    """
+    return {
+        sys.intern(subject): {
+            sys.intern(difficulty): [
+                QuestionRecord(subject, difficulty, question_data["question"], question_data["answer"])
+                for question_data in questions_list
+            ]
+            for difficulty, questions_list in levels.items()
+        }
+        for subject, levels in questions.items()
+    }
+
+
+def iter_questions(questions=QUESTIONS):
+    """Iterate over every question in the bank together with its identifier.
+
+    Args:
+        questions (dict, optional): Question bank to iterate. Defaults to QUESTIONS.
+
+    Yields:
+        tuple: (question_id, subject, difficulty, question_data) for each question.
+    """
+    for subject, levels in questions.items():
+        for difficulty, questions_list in levels.items():
+            for question_data in questions_list:
+                yield _record_id(subject, difficulty, question_data), subject, difficulty, question_data
+
+
+def get_question(question_id, questions=QUESTIONS):
+    """Look up a question by its identifier.
+
+    Args:
+        question_id (str): Identifier of the form "subject/difficulty/hash".
+        questions (dict, optional): Question bank to look in. Defaults to QUESTIONS.
+
+    Returns:
+        tuple: (subject, difficulty, question_data).
+
+    Raises:
+        KeyError: If no question has this identifier.
+    """
+    subject, _, rest = question_id.partition("/")
+    difficulty = rest.partition("/")[0]
+    for question_data in questions.get(subject, {}).get(difficulty, ()):
+        if _record_id(subject, difficulty, question_data) == question_id:
+            return subject, difficulty, question_data
+    raise KeyError(question_id)
+
+
+def _record_id(subject, difficulty, question_data):
+    """Identifier of a QuestionRecord or of a question dict, which may lack its question."""
+    if isinstance(question_data, QuestionRecord):
+        return question_data.id
+    return question_id(subject, difficulty, question_data.get("question", ""))
@@ -0,0 +1,286 @@
+"""Question rendering with health monitoring and a native fallback.
+
+Questions are normally typeset by MathJax in a QWebEngineView. Each render
+is timed from ``setHtml`` to the page's ``loadFinished`` signal and to the
+resolution of MathJax's typeset promise, which the page reports by setting
+its title. A render that fails, or has not finished within RENDER_BUDGET_MS,
+is shown with the native renderer instead: a QLabel with an image drawn by
+matplotlib's mathtext, or the plain LaTeX text if matplotlib is not
+installed. After FALLBACK_AFTER failed renders in a row the web view is no
+longer used.
+
+Timings of the most recent renders are kept in ``QuestionView.timings``, and
+slow ones are printed, so problems on slow machines are visible.
+"""
+
+import io
+import json
+import time
+from collections import deque, namedtuple
+from functools import lru_cache
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QLabel, QStackedWidget
+
+# Time a MathJax render may take before the native renderer is used.
+RENDER_BUDGET_MS = 2000
+
+# Renders slower than this are reported.
+SLOW_RENDER_MS = 500
+
+# Failed or late MathJax renders in a row after which the web view is given up.
+FALLBACK_AFTER = 2
+
+# Number of render timings kept.
+TIMING_HISTORY = 200
+
+# Font size of natively rendered questions, in points.
+NATIVE_FONT_SIZE = 22
+
+# Colour of natively rendered text, matching the application style sheet.
+NATIVE_TEXT_COLOR = "#f0f0f0"
+
+MATHJAX_URL = "https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"
+
+# Page for a question. The page sets its title to "typeset:<id>" when MathJax
+# has finished, or to "error:<id>:<message>" if MathJax fails to load or typeset.
+QUESTION_HTML = """
+<html>
+<head>
+    <script>
+        window.MathJax = {{
+            tex: {{inlineMath: [['$','$'], ['\\\\(','\\\\)']]}},
+            startup: {{
+                pageReady: function () {{
+                    return MathJax.startup.defaultPageReady().then(function () {{
+                        document.title = "typeset:{render_id}";
+                    }}).catch(function (error) {{
+                        document.title = "error:{render_id}:" + error;
+                    }});
+                }}
+            }}
+        }};
+    </script>
+    <script src="{mathjax_url}" onerror='document.title = "error:{render_id}:MathJax could not be loaded"'></script>
+</head>
+<body style="font-size: 30px; padding: 20px; text-align: center; font-family: Arial;">
+    <p><b>Question:</b></p>
+    <p>\\({question}\\)</p>
+</body>
+</html>
+"""
+
+RenderTiming = namedtuple("RenderTiming", ["render_id", "renderer", "status", "load_ms", "total_ms"])
+RenderTiming.__doc__ = """Timing of a single question render.
+
+Attributes:
+    render_id (int): Sequence number of the render.
+    renderer (str): "mathjax" or "native".
+    status (str): "ok", "slow", "timeout" or "error".
+    load_ms (float or None): Time until the page finished loading, for MathJax renders.
+    total_ms (float): Time until the question was shown.
+"""
+
+
+@lru_cache(maxsize=256)
+def render_png(text, font_size=NATIVE_FONT_SIZE, color=NATIVE_TEXT_COLOR):
+    """Draw text with embedded $...$ math as a PNG image using matplotlib's mathtext.
+
+    Results are cached, so a question that was shown before is not drawn again.
+
+    Args:
+        text (str): Text to draw, with math between dollar signs.
+        font_size (int, optional): Font size in points. Defaults to NATIVE_FONT_SIZE.
+        color (str, optional): Text colour. Defaults to NATIVE_TEXT_COLOR.
+
+    Returns:
+        bytes or None: PNG data, or None if matplotlib is not installed or
+            cannot draw the text.
+    """
+    try:
+        import matplotlib
+        from matplotlib import mathtext
+        from matplotlib.font_manager import FontProperties
+    except ImportError:
+        return None
+    buffer = io.BytesIO()
+    try:
+        with matplotlib.rc_context({"text.color": color}):
+            mathtext.math_to_image(text, buffer, prop=FontProperties(size=font_size), dpi=100, format="png")
+    except (ValueError, RuntimeError) as e:
+        print(f"Could not draw {text!r} with mathtext: {e}")
+        return None
+    return buffer.getvalue()
+
+
+def mathtext_source(question):
+    """Turn a question into mathtext input, with the instruction as plain text.
+
+    Args:
+        question (str): The question, such as "Simplify: 2x + 5x".
+
+    Returns:
+        str: Mathtext source, such as "Simplify: $2x + 5x$".
+    """
+    instruction, separator, expression = question.partition(":")
+    if not separator:
+        return f"${question}$"
+    return f"{instruction}: ${expression.strip()}$"
+
+
+class QuestionView(QStackedWidget):
+    """Shows the current question, with MathJax or natively.
+
+    Attributes:
+        timings (deque): RenderTiming of the most recent renders.
+        web_enabled (bool): False once MathJax has been given up on.
+    """
+
+    def __init__(self, use_web=True, parent=None):
+        """Create the web view and the native fallback label.
+
+        Args:
+            use_web (bool, optional): Render with MathJax when possible.
+                Defaults to True.
+            parent (QWidget, optional): Parent widget. Defaults to None.
+        """
+        super().__init__(parent)
+        self.timings = deque(maxlen=TIMING_HISTORY)
+        self.web_enabled = use_web
+        self._render_id = 0
+        self._started_ns = None
+        self._load_ms = None
+        self._pending = None     # question of the MathJax render in progress
+        self._failures = 0
+
+        self.nativeLabel = QLabel()
+        self.nativeLabel.setObjectName("nativeQuestion")
+        self.nativeLabel.setAlignment(Qt.AlignCenter)
+        self.nativeLabel.setWordWrap(True)
+
+        self.webView = None
+        if use_web:
+            from PyQt5.QtWebEngineWidgets import QWebEngineView
+            self.webView = QWebEngineView()
+            self.webView.loadFinished.connect(self._onLoadFinished)
+            self.webView.titleChanged.connect(self._onTitleChanged)
+            self.addWidget(self.webView)
+        self.addWidget(self.nativeLabel)
+
+        self.budget_timer = QTimer(self)
+        self.budget_timer.setSingleShot(True)
+        self.budget_timer.timeout.connect(self._onBudgetExceeded)
+
+    def show_question(self, question):
+        """Render a question.
+
+        Args:
+            question (str): The question in LaTeX format.
+        """
+        self._render_id += 1
+        self._started_ns = time.perf_counter_ns()
+        self._load_ms = None
+        self.budget_timer.stop()
+        if not self.web_enabled:
+            self._pending = None
+            self._showNative(question)
+            return
+        self._pending = question
+        self.webView.setHtml(QUESTION_HTML.format(
+            render_id=self._render_id,
+            mathjax_url=MATHJAX_URL,
+            question=question,
+        ))
+        self.setCurrentWidget(self.webView)
+        self.budget_timer.start(RENDER_BUDGET_MS)
+
+    def summary(self):
+        """Summarize the recorded render timings.
+
+        Returns:
+            dict: Number of renders, how many used each renderer, how many
+                were slow or failed, and the median and maximum total time in ms.
+        """
+        totals = sorted(timing.total_ms for timing in self.timings)
+        return {
+            "renders": len(totals),
+            "mathjax": sum(timing.renderer == "mathjax" for timing in self.timings),
+            "native": sum(timing.renderer == "native" for timing in self.timings),
+            "slow": sum(timing.status == "slow" for timing in self.timings),
+            "failed": sum(timing.status in ("timeout", "error") for timing in self.timings),
+            "median_ms": totals[len(totals) // 2] if totals else None,
+            "max_ms": totals[-1] if totals else None,
+        }
+
+    def _elapsed_ms(self):
+        """Milliseconds since the current render started."""
+        return (time.perf_counter_ns() - self._started_ns) / 1e6
+
+    def _onLoadFinished(self, ok):
+        """Record when the page has loaded, and fall back if it could not be loaded."""
+        if self._pending is None:
+            return
+        self._load_ms = self._elapsed_ms()
+        if not ok:
+            self._fallBack("error", "page did not load")
+
+    def _onTitleChanged(self, title):
+        """Handle the typeset result reported by the page through its title."""
+        status, _, rest = title.partition(":")
+        render_id, _, message = rest.partition(":")
+        if self._pending is None or status not in ("typeset", "error") or render_id != str(self._render_id):
+            return
+        if status == "error":
+            self._fallBack("error", message)
+            return
+        self.budget_timer.stop()
+        total_ms = self._elapsed_ms()
+        self._pending = None
+        self._failures = 0
+        self._record("mathjax", "slow" if total_ms > SLOW_RENDER_MS else "ok", total_ms)
+
+    def _onBudgetExceeded(self):
+        """Show the question natively when MathJax takes too long."""
+        if self._pending is not None:
+            self._fallBack("timeout", f"not typeset within {RENDER_BUDGET_MS} ms")
+
+    def _fallBack(self, status, reason):
+        """Record a failed MathJax render and show the question natively instead.
+
+        Args:
+            status (str): "timeout" or "error".
+            reason (str): Description of the failure.
+        """
+        self.budget_timer.stop()
+        question = self._pending
+        self._pending = None
+        self._record("mathjax", status, self._elapsed_ms(), reason)
+        self._failures += 1
+        if self._failures >= FALLBACK_AFTER and self.web_enabled:
+            self.web_enabled = False
+            print(f"MathJax failed {self._failures} times in a row, using the native renderer from now on")
+            print(f"Render summary: {json.dumps(self.summary())}")
+        self._started_ns = time.perf_counter_ns()
+        self._load_ms = None
+        self._showNative(question)
+
+    def _showNative(self, question):
+        """Render a question with mathtext, or as plain text without matplotlib."""
+        png = render_png(mathtext_source(question))
+        pixmap = QPixmap()
+        if png is not None and pixmap.loadFromData(png, "PNG"):
+            self.nativeLabel.setPixmap(pixmap)
+        else:
+            self.nativeLabel.setText(question)
+        self.setCurrentWidget(self.nativeLabel)
+        total_ms = self._elapsed_ms()
+        self._record("native", "slow" if total_ms > SLOW_RENDER_MS else "ok", total_ms)
+
+    def _record(self, renderer, status, total_ms, reason=""):
+        """Store the timing of a render and report it if it was slow or failed."""
+        timing = RenderTiming(self._render_id, renderer, status,
+                              None if self._load_ms is None else round(self._load_ms, 1), round(total_ms, 1))
+        self.timings.append(timing)
+        if status != "ok":
+            detail = f": {reason}" if reason else ""
+            print(f"Render {timing.render_id} ({renderer}) {status} after {timing.total_ms} ms{detail}")
@@ -0,0 +1,287 @@
+"""Recording and headless replay of games.
+
+Every game draws its questions from a ``random.Random`` seeded at the start
+of the game. The seed, the starting state and every event (each question
+shown, each submitted answer with its time, each skip) are kept by a
+SessionRecorder and written to ``recordings/`` as JSONL when the game ends:
+a header line followed by one line per event.
+
+``mathgame replay`` runs recorded games again without a window and as fast
+as possible, with a fresh database, and reports any event that turns out
+differently along with the time spent verifying answers. Recordings made
+by ``mathgame simulate`` turn this into a repeatable workload for profiling
+the verifier and the database.
+
+Review sessions are not recorded, since their questions come from the
+player's review schedule rather than the seed.
+
+Usage::
+
+    mathgame replay recordings/20250101-120000-1234.jsonl
+    mathgame replay recordings/*.jsonl --repeat 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Directory recordings are written to, next to the score database.
+RECORDING_DIR = "recordings"
+
+# Version of the recording format; recordings with another version are rejected.
+RECORDING_VERSION = 3
+
+
+class SessionRecorder:
+    """Collects the seed and events of a game and writes them as a recording.
+
+    Attributes:
+        directory (str): Directory recordings are written to.
+        header (dict): Seed and starting state of the game being recorded,
+            or None when no game is being recorded.
+        events (list): Events of the game being recorded.
+    """
+
+    def __init__(self, directory=RECORDING_DIR):
+        """Create a recorder.
+
+        Args:
+            directory (str, optional): Directory recordings are written to.
+                Defaults to RECORDING_DIR.
+        """
+        self.directory = directory
+        self.header = None
+        self.events = []
+        self._started = None
+
+    def start(self, header):
+        """Start recording a game, discarding any unfinished recording.
+
+        Args:
+            header (dict): JSON-serializable seed and starting state.
+        """
+        self.header = dict(header, version=RECORDING_VERSION)
+        self.events = []
+        self._started = time.perf_counter()
+
+    def event(self, kind, **fields):
+        """Record an event of the current game.
+
+        Args:
+            kind (str): "question", "answer", "skip" or "finish".
+            **fields: JSON-serializable details of the event.
+
+        Returns:
+            dict or None: The recorded event, which the caller may add the
+                outcome to, or None when no game is being recorded.
+        """
+        if self.header is None:
+            return None
+        event = {"type": kind, "at": round(time.perf_counter() - self._started, 4)}
+        event.update(fields)
+        self.events.append(event)
+        return event
+
+    def save(self):
+        """Write the current recording and stop recording.
+
+        Returns:
+            str or None: Path of the recording, or None if no game was being
+                recorded or it could not be written.
+        """
+        if self.header is None:
+            return None
+        header, events = self.header, self.events
+        self.header, self.events = None, []
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{header['seed']}.jsonl")
+        try:
+            write_recording(path, header, events)
+        except OSError as e:
+            print(f"Could not write recording {path}: {e}")
+            return None
+        return path
+
+
+def write_recording(path, header, events):
+    """Write a recording as JSONL.
+
+    Args:
+        path (str): File to write.
+        header (dict): Seed and starting state of the game.
+        events (list): Events of the game.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for line in [header] + events:
+            f.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def load_recording(path):
+    """Read a recording.
+
+    Args:
+        path (str): Recording file.
+
+    Returns:
+        tuple: (header, events).
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is not a recording of this version.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or not isinstance(lines[0], dict) or lines[0].get("version") != RECORDING_VERSION:
+        raise ValueError(f"{path} is not a version {RECORDING_VERSION} recording")
+    return lines[0], lines[1:]
+
+
+def _restore_ratings(db, header):
+    """Store the ratings an adaptive game started with in a fresh database."""
+    ratings = header["ratings"]
+    # A player with rated answers has rated questions, so the player's row
+    # is written along with them
+    player = (header["player"], *ratings["player"])
+    for qid, (rating, attempts) in ratings["questions"].items():
+        db.save_ratings(player, (qid, rating, attempts))
+
+
+def replay_recording(header, events, db=None, quiet=True):
+    """Run a recorded game again without a window.
+
+    Args:
+        header (dict): Seed and starting state of the game.
+        events (list): Events of the game.
+        db (DatabaseManager, optional): Database to play against. Defaults to
+            a fresh database in a temporary directory.
+        quiet (bool, optional): Hide what the game prints. Defaults to True.
+
+    Returns:
+        dict: "events" replayed, "mismatches" (descriptions of events that
+            turned out differently), "points" recorded and replayed,
+            "seconds" the replay took and "verify_ms", the time each answer
+            took to check.
+    """
+    from db import DatabaseManager
+    from logic import GameManager
+    from scheduler import AdaptiveScheduler
+
+    mismatches = []
+    verify_ms = []
+    with contextlib.ExitStack() as stack:
+        if db is None:
+            directory = stack.enter_context(tempfile.TemporaryDirectory())
+            db = DatabaseManager(os.path.join(directory, "replay.db"))
+            db.init_db()
+        if quiet:
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+        manager = GameManager(db=db)
+        manager.set_difficulty(header["difficulty"])
+        manager.set_subjects(header["subjects"])
+        manager.set_weights(header["weights"])
+        manager.player_name = header.get("player")
+        if header.get("ratings"):
+            _restore_ratings(db, header)
+            # start_game and resume keep a scheduler made for the same player
+            manager.scheduler = AdaptiveScheduler(db, manager.player_name, manager.questions, manager.rng)
+            manager.scheduler.recent.extend(header["ratings"]["recent"])
+
+        start = time.perf_counter()
+        if "question" in header:
+            # A resumed game starts at the question it was resumed at
+            manager.resume(dict(header, pending=[]), seed=header["seed"])
+        else:
+            manager.start_game(seed=header["seed"])
+
+        for number, event in enumerate(events, 1):
+            kind = event.get("type")
+            if kind == "question":
+                if manager.current_question_id != event["id"]:
+                    mismatches.append(f"event {number}: question {manager.current_question_id}, "
+                                      f"recorded {event['id']}")
+            elif kind == "answer":
+                check_start = time.perf_counter()
+                correct = manager.check_answer(event["answer"], event["elapsed"])
+                verify_ms.append((time.perf_counter() - check_start) * 1000)
+                if "correct" in event and correct != event["correct"]:
+                    mismatches.append(f"event {number}: answer {event['answer']!r} was "
+                                      f"{'correct' if correct else 'wrong'}, recorded {event['correct']}")
+            elif kind == "skip":
+                manager.skip_question()
+            elif kind == "finish" and manager.current_points != event["points"]:
+                mismatches.append(f"event {number}: {manager.current_points} points, recorded {event['points']}")
+        seconds = time.perf_counter() - start
+
+    recorded_points = next((event["points"] for event in events if event.get("type") == "finish"), None)
+    return {
+        "events": len(events),
+        "mismatches": mismatches,
+        "points": (recorded_points, manager.current_points),
+        "seconds": seconds,
+        "verify_ms": verify_ms,
+    }
+
+
+def timing_summary(samples):
+    """Summarize timings in ms.
+
+    Args:
+        samples (list): Timings in ms.
+
+    Returns:
+        str: Count, median, 95th percentile and maximum.
+    """
+    if not samples:
+        return "no answers"
+    ordered = sorted(samples)
+    return (f"{len(ordered)} answers, median {ordered[len(ordered) // 2]:.2f} ms, "
+            f"p95 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]:.2f} ms, max {ordered[-1]:.2f} ms")
+
+
+def main(argv=None):
+    """Replay recorded games.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Process exit code, 1 if any replay differed from its recording.
+    """
+    parser = argparse.ArgumentParser(prog="mathgame replay", description="Replay recorded games without a window.")
+    parser.add_argument("recordings", nargs="+", help="recording files")
+    parser.add_argument("--repeat", type=int, default=1, help="times to replay each recording (default: 1)")
+    parser.add_argument("--verbose", action="store_true", help="show what the game prints")
+    args = parser.parse_args(argv)
+
+    failed = False
+    all_verify_ms = []
+    for path in args.recordings:
+        try:
+            header, events = load_recording(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            failed = True
+            continue
+        for _ in range(max(1, args.repeat)):
+            report = replay_recording(header, events, quiet=not args.verbose)
+            all_verify_ms.extend(report["verify_ms"])
+            recorded, replayed = report["points"]
+            status = "ok" if not report["mismatches"] else f"{len(report['mismatches'])} mismatches"
+            print(f"{path}: seed {header['seed']}, {report['events']} events in {report['seconds'] * 1000:.0f} ms, "
+                  f"{replayed} points (recorded {recorded}), {status}")
+            for mismatch in report["mismatches"]:
+                print(f"  {mismatch}")
+            failed = failed or bool(report["mismatches"])
+    print(f"Verification: {timing_summary(all_verify_ms)}")
+    return 1 if failed else 0
@@ -0,0 +1,348 @@
+"""Packed application resources.
+
+The stylesheet and the files in ``assets/`` are packed into a single
+archive, ``resources.zip``, by ``mathgame build-resources``. The archive is
+memory-mapped when first used, so a start reads one file instead of many
+small ones, and members are stored uncompressed so reading them is a copy
+out of the mapping. Stylesheets are validated when the archive is built,
+since Qt silently ignores rules it cannot parse.
+
+Loose files are used when the archive has not been built, which is the
+case for installed packages, or when a packed file was edited after the
+archive was built. This is decided once, when the archive is opened, so
+reading a resource never touches the loose files while the archive is used.
+
+Usage::
+
+    mathgame build-resources
+    mathgame build-resources --strict
+"""
+
+import argparse
+import mmap
+import os
+import re
+import struct
+import zipfile
+
+RESOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ARCHIVE_PATH = os.path.join(RESOURCE_DIR, "resources.zip")
+
+# Directory of assets such as fonts and images, packed with everything in it.
+ASSET_DIR = "assets"
+
+# Files outside ASSET_DIR that are packed.
+RESOURCE_FILES = ["style.qss"]
+
+# Properties Qt style sheets support. Qt ignores other properties without a warning.
+QSS_PROPERTIES = {
+    "alternate-background-color", "background", "background-attachment", "background-clip",
+    "background-color", "background-image", "background-origin", "background-position",
+    "background-repeat", "border", "border-bottom", "border-bottom-color",
+    "border-bottom-left-radius", "border-bottom-right-radius", "border-bottom-style",
+    "border-bottom-width", "border-color", "border-image", "border-left", "border-left-color",
+    "border-left-style", "border-left-width", "border-radius", "border-right",
+    "border-right-color", "border-right-style", "border-right-width", "border-style",
+    "border-top", "border-top-color", "border-top-left-radius", "border-top-right-radius",
+    "border-top-style", "border-top-width", "border-width", "bottom", "button-layout",
+    "color", "dialogbuttonbox-buttons-have-icons", "font", "font-family", "font-size",
+    "font-style", "font-weight", "gridline-color", "height", "icon", "icon-size", "image",
+    "image-position", "left", "lineedit-password-character", "lineedit-password-mask-delay",
+    "margin", "margin-bottom", "margin-left", "margin-right", "margin-top", "max-height",
+    "max-width", "messagebox-text-interaction-flags", "min-height", "min-width", "opacity",
+    "outline", "outline-bottom-left-radius", "outline-bottom-right-radius", "outline-color",
+    "outline-offset", "outline-radius", "outline-style", "outline-top-left-radius",
+    "outline-top-right-radius", "padding", "padding-bottom", "padding-left", "padding-right",
+    "padding-top", "paint-alternating-row-colors-for-empty-area", "placeholder-text-color",
+    "position", "right", "selection-background-color", "selection-color",
+    "show-decoration-selected", "spacing", "subcontrol-origin", "subcontrol-position",
+    "text-align", "text-decoration", "titlebar-show-tooltips-on-buttons", "top",
+    "widget-animation-duration", "width",
+}
+
+# A single selector such as "QPushButton#dangerButton:hover" or "QComboBox::drop-down".
+_SIMPLE_SELECTOR = r"(?:\*|\.?[A-Za-z_][\w-]*)?(?:#[\w-]+|\[[^\]]+\]|::?!?[\w-]+)*"
+_SELECTOR = re.compile(rf"{_SIMPLE_SELECTOR}(?:\s*[\s>]\s*{_SIMPLE_SELECTOR})*")
+
+# Local file header of a zip member; its last two fields are the lengths of
+# the file name and the extra field that come before the data.
+_LOCAL_HEADER = struct.Struct(zipfile.structFileHeader)
+
+# The archive opened by read_resource, or False if loose files are used.
+_archive = None
+
+
+class ResourceArchive:
+    """Read-only, memory-mapped resource archive.
+
+    Members are sliced straight out of the mapping, which is why the archive
+    stores them uncompressed.
+
+    Attributes:
+        path (str): Path of the archive.
+        mtime (float): Modification time of the archive.
+    """
+
+    def __init__(self, path=ARCHIVE_PATH):
+        """Map the archive and read its table of contents.
+
+        Args:
+            path (str, optional): Path of the archive. Defaults to ARCHIVE_PATH.
+
+        Raises:
+            OSError: If the archive cannot be opened.
+            zipfile.BadZipFile: If the file is not a valid archive.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self.mtime = os.fstat(f.fileno()).st_mtime
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with zipfile.ZipFile(self._map) as archive:
+            self._members = {info.filename: info for info in archive.infolist()}
+
+    def names(self):
+        """List the packed resources.
+
+        Returns:
+            list: Resource names relative to RESOURCE_DIR, with "/" separators.
+        """
+        return list(self._members)
+
+    def read(self, name):
+        """Read a packed resource.
+
+        Args:
+            name (str): Resource name, such as "style.qss".
+
+        Returns:
+            bytes: The resource's contents.
+
+        Raises:
+            KeyError: If the archive does not contain the resource.
+            zipfile.BadZipFile: If the resource is compressed or its header is damaged.
+        """
+        info = self._members[name]
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise zipfile.BadZipFile(f"{name} is compressed, rebuild {self.path}")
+        header = self._map[info.header_offset:info.header_offset + _LOCAL_HEADER.size]
+        fields = _LOCAL_HEADER.unpack(header)
+        if fields[0] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"Bad local header for {name} in {self.path}")
+        start = info.header_offset + _LOCAL_HEADER.size + fields[-2] + fields[-1]
+        return self._map[start:start + info.file_size]
+
+    def close(self):
+        """Unmap the archive."""
+        self._map.close()
+
+
+def _open_archive():
+    """Open the resource archive once, or remember that loose files are used.
+
+    Loose files are used if the archive is missing or invalid, or if any
+    packed file changed after the archive was built.
+    """
+    global _archive
+    if _archive is None:
+        try:
+            _archive = ResourceArchive()
+        except FileNotFoundError:
+            _archive = False
+            return _archive
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            print(f"Warning: Could not open resource archive {ARCHIVE_PATH}: {e}")
+            _archive = False
+            return _archive
+        stale = [name for name in _archive.names() if _changed_since(name, _archive.mtime)]
+        if stale:
+            print(f"Warning: {', '.join(stale)} changed after {ARCHIVE_PATH} was built, "
+                  f"run 'mathgame build-resources'")
+            _archive.close()
+            _archive = False
+    return _archive
+
+
+def _changed_since(name, mtime):
+    """Check whether the loose file of a resource was modified after mtime."""
+    try:
+        return os.stat(os.path.join(RESOURCE_DIR, *name.split("/"))).st_mtime > mtime
+    except OSError:
+        return False
+
+
+def read_resource(name):
+    """Read a resource from the archive, or from its loose file.
+
+    The loose file is used when loose files are used instead of the archive,
+    see _open_archive, or when the archive does not contain the resource.
+
+    Args:
+        name (str): Resource name relative to RESOURCE_DIR, such as "style.qss".
+
+    Returns:
+        bytes: The resource's contents.
+
+    Raises:
+        FileNotFoundError: If the resource is neither packed nor a file.
+    """
+    archive = _open_archive()
+    if archive:
+        try:
+            return archive.read(name)
+        except KeyError:
+            pass
+        except zipfile.BadZipFile as e:
+            print(f"Warning: {e}")
+    with open(os.path.join(RESOURCE_DIR, *name.split("/")), "rb") as f:
+        return f.read()
+
+
+def validate_qss(text):
+    """Check a Qt style sheet for mistakes Qt would silently ignore.
+
+    Args:
+        text (str): Style sheet source.
+
+    Returns:
+        tuple: (errors, warnings), lists of messages with line numbers.
+            Syntax errors make Qt drop rules or the rest of the sheet, and are
+            errors; unknown properties are warnings.
+    """
+    errors = []
+    warnings = []
+    # Comments are blanked out, keeping their newlines so line numbers stay right
+    text = re.sub(r"/\*.*?\*/", lambda m: "\n" * m.group().count("\n"), text, flags=re.S)
+    if "/*" in text:
+        errors.append(f"line {text.count(chr(10), 0, text.index('/*')) + 1}: unterminated comment")
+        text = text[:text.index("/*")]
+
+    position = 0
+    while True:
+        opening = text.find("{", position)
+        closing = text.find("}", position)
+        if opening == -1:
+            if closing != -1 or text[position:].strip():
+                line = text.count("\n", 0, closing if closing != -1 else position) + 1
+                errors.append(f"line {line}: text outside a rule")
+            break
+        line = text.count("\n", 0, opening) + 1
+        if closing != -1 and closing < opening:
+            errors.append(f"line {text.count(chr(10), 0, closing) + 1}: '}}' without a rule")
+            position = closing + 1
+            continue
+        selectors = text[position:opening].strip()
+        if not selectors:
+            errors.append(f"line {line}: rule without a selector")
+        for selector in selectors.split(",") if selectors else []:
+            if not selector.strip() or not _SELECTOR.fullmatch(selector.strip()):
+                errors.append(f"line {line}: invalid selector '{selector.strip()}'")
+        if closing == -1:
+            errors.append(f"line {line}: rule is not closed")
+            break
+        body = text[opening + 1:closing]
+        if "{" in body:
+            errors.append(f"line {line}: '{{' inside a rule")
+        _validate_declarations(body, line, errors, warnings)
+        position = closing + 1
+    return errors, warnings
+
+
+def _validate_declarations(body, line, errors, warnings):
+    """Check the "property: value;" declarations of a rule starting on line."""
+    offset = 0
+    for declaration in body.split(";"):
+        declaration_line = line + body.count("\n", 0, offset + len(declaration) - len(declaration.lstrip()))
+        offset += len(declaration) + 1
+        if not declaration.strip():
+            continue
+        prop, separator, value = declaration.partition(":")
+        prop = prop.strip()
+        if not separator or not value.strip():
+            errors.append(f"line {declaration_line}: '{declaration.strip()}' is not a 'property: value' declaration")
+        elif not re.fullmatch(r"[a-z-]+", prop):
+            errors.append(f"line {declaration_line}: invalid property name '{prop}'")
+        elif prop not in QSS_PROPERTIES and not prop.startswith("qproperty-"):
+            warnings.append(f"line {declaration_line}: unknown property '{prop}'")
+
+
+def collect_resources(directory=RESOURCE_DIR):
+    """List the files to pack.
+
+    Args:
+        directory (str, optional): Directory holding the resources. Defaults
+            to RESOURCE_DIR.
+
+    Returns:
+        list: Resource names relative to directory, with "/" separators.
+    """
+    names = [name for name in RESOURCE_FILES if os.path.isfile(os.path.join(directory, name))]
+    for root, dirs, files in os.walk(os.path.join(directory, ASSET_DIR)):
+        dirs.sort()
+        for filename in sorted(files):
+            relative = os.path.relpath(os.path.join(root, filename), directory)
+            names.append(relative.replace(os.sep, "/"))
+    return names
+
+
+def build_archive(names, path=ARCHIVE_PATH, directory=RESOURCE_DIR):
+    """Pack resources into an archive.
+
+    The archive is written to a temporary file first and moved into place,
+    so a running game never maps a partly written archive.
+
+    Args:
+        names (list): Resource names relative to directory.
+        path (str, optional): Archive to write. Defaults to ARCHIVE_PATH.
+        directory (str, optional): Directory holding the resources. Defaults
+            to RESOURCE_DIR.
+
+    Returns:
+        int: Total size of the packed resources in bytes.
+    """
+    total = 0
+    temporary = path + ".tmp"
+    with zipfile.ZipFile(temporary, "w", zipfile.ZIP_STORED) as archive:
+        for name in names:
+            archive.write(os.path.join(directory, *name.split("/")), name)
+            total += archive.getinfo(name).file_size
+    os.replace(temporary, path)
+    return total
+
+
+def main(argv=None):
+    """Validate the style sheets and pack the resources.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Process exit code, 1 if a style sheet has errors.
+    """
+    parser = argparse.ArgumentParser(prog="mathgame build-resources",
+                                     description="Validate the style sheets and pack the resources.")
+    parser.add_argument("-o", "--output", default=ARCHIVE_PATH, help="archive file")
+    parser.add_argument("--strict", action="store_true", help="also fail on warnings")
+    args = parser.parse_args(argv)
+
+    names = collect_resources()
+    error_count = warning_count = 0
+    for name in names:
+        if not name.endswith(".qss"):
+            continue
+        with open(os.path.join(RESOURCE_DIR, *name.split("/")), "r", encoding="utf-8") as f:
+            errors, warnings = validate_qss(f.read())
+        for message in errors:
+            print(f"ERROR   {name} {message}")
+        for message in warnings:
+            print(f"warning {name} {message}")
+        error_count += len(errors)
+        warning_count += len(warnings)
+
+    print(f"Checked {len(names)} resources: {error_count} errors, {warning_count} warnings")
+    if error_count or (args.strict and warning_count):
+        print("Resource archive not written")
+        return 1
+    size = build_archive(names, args.output)
+    print(f"Wrote {args.output} ({size} bytes)")
+    return 0
@@ -0,0 +1,166 @@
+"""Spaced-repetition review of missed and slow questions.
+
+Questions a player skips, gets wrong before getting right, or answers
+slowly are stored per player and rescheduled with the SM-2 algorithm: each
+successful review pushes the next one further out, a failed review brings
+the question back the next day. A review session asks the questions that
+are due, earliest first.
+"""
+
+import heapq
+from datetime import datetime, timedelta, timezone
+
+# Number of questions in a review session.
+REVIEW_SESSION_SIZE = 10
+
+# Correct answers slower than this many seconds are scheduled for review.
+SLOW_ANSWER_SECONDS = 20.0
+
+# SM-2 starting and lowest easiness factor.
+INITIAL_EASINESS = 2.5
+MIN_EASINESS = 1.3
+
+# Answers of at least this quality are not added to the review list, and
+# count as a successful review.
+GOOD_QUALITY = 4
+PASSING_QUALITY = 3
+
+
+def timestamp(moment=None):
+    """Format a time the way SQLite's CURRENT_TIMESTAMP does.
+
+    Args:
+        moment (datetime, optional): Aware time to format. Defaults to now.
+
+    Returns:
+        str: UTC time as "YYYY-MM-DD HH:MM:SS", which sorts chronologically.
+    """
+    moment = moment or datetime.now(timezone.utc)
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def answer_quality(correct, elapsed_time=0.0, wrong_attempts=0):
+    """Grade an answer on the SM-2 scale from 0 to 5.
+
+    Args:
+        correct (bool): False if the question was skipped.
+        elapsed_time (float, optional): Time taken to answer in seconds. Defaults to 0.
+        wrong_attempts (int, optional): Incorrect answers given before the
+            correct one. Defaults to 0.
+
+    Returns:
+        int: 1 for a skip, 2 for a correct answer after wrong attempts, 3 for
+            a slow answer, 4 for a hesitant one and 5 for a quick one.
+    """
+    if not correct:
+        return 1
+    if wrong_attempts:
+        return 2
+    if elapsed_time > SLOW_ANSWER_SECONDS:
+        return 3
+    if elapsed_time > SLOW_ANSWER_SECONDS / 2:
+        return 4
+    return 5
+
+
+def sm2(quality, easiness=INITIAL_EASINESS, interval=0.0, repetitions=0):
+    """Apply one SM-2 step to a review item.
+
+    Args:
+        quality (int): Answer quality from 0 to 5, see answer_quality.
+        easiness (float, optional): Current easiness factor.
+        interval (float, optional): Current interval in days.
+        repetitions (int, optional): Successful reviews in a row.
+
+    Returns:
+        tuple: New (easiness, interval, repetitions).
+    """
+    if quality < PASSING_QUALITY:
+        repetitions = 0
+        interval = 1.0
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1.0
+        elif repetitions == 2:
+            interval = 6.0
+        else:
+            interval = round(interval * easiness)
+    miss = 5 - quality
+    easiness = max(MIN_EASINESS, easiness + 0.1 - miss * (0.08 + miss * 0.02))
+    return easiness, interval, repetitions
+
+
+def record_review(db, player_name, qid, quality, state=None, now=None):
+    """Reschedule a question for a player after an answer.
+
+    New questions are only added when the answer was a miss or slow; a
+    question already on the player's review list is rescheduled whatever
+    the quality.
+
+    Args:
+        db (DatabaseManager): Database holding the review items.
+        player_name (str): Name of the player.
+        qid (str): Identifier of the answered question.
+        quality (int): Answer quality from 0 to 5.
+        state (tuple, optional): Known (easiness, interval, repetitions) of
+            the item, which saves looking it up.
+        now (datetime, optional): Time of the answer. Defaults to now.
+
+    Returns:
+        str or None: The new due time, or None if nothing was stored.
+    """
+    if state is None:
+        state = db.get_review_item(player_name, qid)
+        if state is None:
+            if quality >= GOOD_QUALITY:
+                return None
+            state = (INITIAL_EASINESS, 0.0, 0)
+    easiness, interval, repetitions = sm2(quality, *state)
+    due = timestamp((now or datetime.now(timezone.utc)) + timedelta(days=interval))
+    if not db.save_review_item(player_name, qid, easiness, interval, repetitions, due):
+        return None
+    return due
+
+
+class ReviewQueue:
+    """Questions due for review for one player, earliest due first.
+
+    The due items are read with one query on the (name, due) index and kept
+    in a heap, so the session never scans the player's whole history.
+
+    Attributes:
+        player_name (str): Name of the player.
+        states (dict): (easiness, interval, repetitions) by question identifier.
+    """
+
+    def __init__(self, db, player_name, limit=REVIEW_SESSION_SIZE, now=None):
+        """Load the questions that are due.
+
+        Args:
+            db (DatabaseManager): Database holding the review items.
+            player_name (str): Name of the player.
+            limit (int, optional): Maximum number of questions. Defaults to REVIEW_SESSION_SIZE.
+            now (datetime, optional): Items due up to this time are loaded. Defaults to now.
+        """
+        self.player_name = player_name
+        self.states = {}
+        self._heap = []
+        for qid, due, easiness, interval, repetitions in db.get_due_reviews(player_name, timestamp(now), limit):
+            self.states[qid] = (easiness, interval, repetitions)
+            self._heap.append((due, qid))
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        """Return the number of questions left in the queue."""
+        return len(self._heap)
+
+    def pop(self):
+        """Remove and return the question that has been due longest.
+
+        Returns:
+            str or None: Identifier of the question, or None if the queue is empty.
+        """
+        if not self._heap:
+            return None
+        return heapq.heappop(self._heap)[1]
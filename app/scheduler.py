@@ -0,0 +1,241 @@
+"""Adaptive question selection based on Elo ratings.
+
+Players and questions both carry an Elo rating. After each question the
+player's outcome moves both ratings, and the next question is picked from
+those whose rating gives the player a TARGET_SUCCESS chance of answering
+correctly. Outcomes are graded by response time relative to the player's
+own average, so a slow correct answer counts for less than a quick one.
+
+Questions are kept in buckets of BUCKET_WIDTH rating points per subject. A
+rating update moves one question between buckets in constant time, and a
+selection only looks at the buckets around the target rating, so neither
+depends on the size of the question bank.
+"""
+
+import math
+import random
+from collections import deque
+from questions import iter_questions
+
+# Starting ratings for players and for questions of each difficulty.
+INITIAL_PLAYER_RATING = 1200.0
+INITIAL_QUESTION_RATINGS = {"easy": 1000.0, "hard": 1400.0}
+
+# How far a single outcome moves a rating. Question ratings move less,
+# since they are shared by every player.
+PLAYER_K = 32.0
+QUESTION_K = 16.0
+
+# Probability of a correct answer the scheduler aims for.
+TARGET_SUCCESS = 0.7
+
+# Width of a rating bucket in the selection index.
+BUCKET_WIDTH = 100
+
+# Weight of the newest answer in the player's average response time.
+TIME_SMOOTHING = 0.2
+
+# Lowest outcome for a correct first attempt, however slow.
+MIN_CORRECT_OUTCOME = 0.5
+
+# Number of recent questions that are not asked again.
+RECENT_SIZE = 5
+
+
+def expected_score(player_rating, question_rating):
+    """Probability that a player answers a question correctly.
+
+    Args:
+        player_rating (float): The player's rating.
+        question_rating (float): The question's rating.
+
+    Returns:
+        float: Expected outcome between 0 and 1.
+    """
+    return 1.0 / (1.0 + 10.0 ** ((question_rating - player_rating) / 400.0))
+
+
+def answer_outcome(correct, elapsed_time, average_time, wrong_attempts=0):
+    """Grade how well a question was answered.
+
+    A correct answer no slower than the player's average scores 1. Slower
+    answers score proportionally less, down to MIN_CORRECT_OUTCOME, and each
+    wrong attempt before the correct one halves the outcome. A skipped
+    question scores 0.
+
+    Args:
+        correct (bool): False if the question was skipped.
+        elapsed_time (float): Time taken to answer in seconds.
+        average_time (float or None): The player's average response time in
+            seconds, or None if unknown.
+        wrong_attempts (int, optional): Incorrect answers given before the
+            correct one. Defaults to 0.
+
+    Returns:
+        float: Outcome between 0 and 1.
+    """
+    if not correct:
+        return 0.0
+    outcome = 1.0
+    if average_time and elapsed_time > average_time:
+        outcome = max(MIN_CORRECT_OUTCOME, average_time / elapsed_time)
+    return outcome * 0.5 ** wrong_attempts
+
+
+class AdaptiveScheduler:
+    """Chooses questions matched to a player's rating and updates ratings.
+
+    Attributes:
+        db (DatabaseManager): Database the ratings are loaded from and saved to.
+        player_name (str): Name of the player being scheduled for.
+        player_rating (float): The player's current rating.
+        player_answers (int): Number of questions the player has been rated on.
+        average_time (float or None): Smoothed response time of the player's
+            correct answers in seconds, or None before the first one.
+        ratings (dict): Question rating by question identifier.
+        attempts (dict): Number of rated attempts by question identifier.
+    """
+
+    def __init__(self, db, player_name, questions, rng=random):
+        """Load ratings and build the bucket index.
+
+        Args:
+            db (DatabaseManager): Database holding the ratings.
+            player_name (str): Name of the player.
+            questions (dict): Question bank organized by subject and difficulty.
+            rng (random.Random, optional): Source of randomness. Defaults to
+                the random module.
+        """
+        self.db = db
+        self.player_name = player_name
+        self.rng = rng
+        self.recent = deque(maxlen=RECENT_SIZE)
+
+        player = db.get_player_rating(player_name)
+        if player is None:
+            self.player_rating, self.player_answers, self.average_time = INITIAL_PLAYER_RATING, 0, None
+        else:
+            self.player_rating, self.player_answers, self.average_time = player
+
+        stored = db.get_question_ratings()
+        self.ratings = {}
+        self.attempts = {}
+        self._buckets = {}     # subject -> {bucket number -> [question ids]}
+        self._positions = {}   # question id -> (subject, bucket number, index in bucket)
+        for qid, subject, difficulty, question_data in iter_questions(questions):
+            rating, attempts = stored.get(qid, (INITIAL_QUESTION_RATINGS.get(difficulty, INITIAL_PLAYER_RATING), 0))
+            self.ratings[qid] = rating
+            self.attempts[qid] = attempts
+            self._add(qid, subject, self._bucket(rating))
+
+    def target_rating(self):
+        """Rating of the questions the player should be asked next.
+
+        Returns:
+            float: The question rating at which the expected score equals
+                TARGET_SUCCESS.
+        """
+        return self.player_rating - 400.0 * math.log10(TARGET_SUCCESS / (1.0 - TARGET_SUCCESS))
+
+    def choose(self, subjects):
+        """Pick the next question for the player.
+
+        Searches outwards from the bucket of the target rating and returns a
+        random question from the nearest non-empty buckets, skipping the
+        questions asked most recently while any others remain.
+
+        Args:
+            subjects (list): Subjects to choose from.
+
+        Returns:
+            str or None: Identifier of the chosen question, or None if the
+                subjects have no questions.
+        """
+        indexes = [self._buckets[subject] for subject in subjects if self._buckets.get(subject)]
+        if not indexes:
+            return None
+        target = self._bucket(self.target_rating())
+        lowest = min(min(index) for index in indexes)
+        highest = max(max(index) for index in indexes)
+        reach = max(target - lowest, highest - target)
+
+        fallback = None
+        for distance in range(reach + 1):
+            candidates = []
+            for bucket in {target - distance, target + distance}:
+                for index in indexes:
+                    candidates.extend(index.get(bucket, ()))
+            # Bucket order depends on the history of rating changes; sorting
+            # makes the choice depend only on the ratings and the rng, so a
+            # seeded game can be replayed from a snapshot of the ratings
+            candidates.sort()
+            fresh = [qid for qid in candidates if qid not in self.recent]
+            if fresh:
+                qid = self.rng.choice(fresh)
+                self.recent.append(qid)
+                return qid
+            if candidates and fallback is None:
+                fallback = self.rng.choice(candidates)
+        return fallback
+
+    def record(self, qid, outcome, elapsed_time=None):
+        """Update the player's and the question's rating after an answer.
+
+        Both ratings move by the difference between the outcome and the
+        expected score, and the question moves to its new bucket. The new
+        ratings are saved to the database.
+
+        Args:
+            qid (str): Identifier of the answered question.
+            outcome (float): Outcome between 0 and 1, see answer_outcome.
+            elapsed_time (float, optional): Response time in seconds of a
+                correct answer, used to update the player's average time.
+
+        Returns:
+            bool: True if the ratings were saved, False on a database error.
+        """
+        question_rating = self.ratings[qid]
+        surprise = outcome - expected_score(self.player_rating, question_rating)
+        self.player_rating += PLAYER_K * surprise
+        self.player_answers += 1
+        if elapsed_time is not None:
+            if self.average_time is None:
+                self.average_time = elapsed_time
+            else:
+                self.average_time += TIME_SMOOTHING * (elapsed_time - self.average_time)
+
+        new_rating = question_rating - QUESTION_K * surprise
+        self.ratings[qid] = new_rating
+        self.attempts[qid] += 1
+        subject, bucket, _ = self._positions[qid]
+        if self._bucket(new_rating) != bucket:
+            self._remove(qid)
+            self._add(qid, subject, self._bucket(new_rating))
+
+        return self.db.save_ratings(
+            (self.player_name, self.player_rating, self.player_answers, self.average_time),
+            (qid, new_rating, self.attempts[qid]),
+        )
+
+    @staticmethod
+    def _bucket(rating):
+        """Return the bucket number of a rating."""
+        return int(rating // BUCKET_WIDTH)
+
+    def _add(self, qid, subject, bucket):
+        """Append a question to a bucket."""
+        members = self._buckets.setdefault(subject, {}).setdefault(bucket, [])
+        self._positions[qid] = (subject, bucket, len(members))
+        members.append(qid)
+
+    def _remove(self, qid):
+        """Remove a question from its bucket by swapping in the bucket's last entry."""
+        subject, bucket, position = self._positions.pop(qid)
+        index = self._buckets[subject]
+        members = index[bucket]
+        last = members.pop()
+        if last != qid:
+            members[position] = last
+            self._positions[last] = (subject, bucket, position)
+        if not members:
+            del index[bucket]
@@ -0,0 +1,251 @@
+"""Bulk export and import of score history.
+
+Scores are streamed in chunks in both directions, so files with millions of
+rows can be merged without loading them into memory. CSV is always
+available; Parquet and Arrow need the optional ``pyarrow`` package.
+
+Usage::
+
+    mathgame scores export scores.csv
+    mathgame scores import machine1.parquet machine2.csv
+"""
+
+import argparse
+import csv
+import os
+from db import DatabaseManager
+
+COLUMNS = ["name", "score", "difficulty", "subject", "date"]
+
+# Number of rows read or written at a time.
+CHUNK_SIZE = 10000
+
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+
+def detect_format(path):
+    """Work out the file format from a file name.
+
+    Args:
+        path (str): Path of the score file.
+
+    Returns:
+        str: "csv", "parquet" or "arrow".
+
+    Raises:
+        ValueError: If the extension is not recognized.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unknown score file format '{extension}', expected one of {', '.join(FORMATS)}")
+    return FORMATS[extension]
+
+
+def _require_pyarrow():
+    """Import pyarrow, which is only needed for Parquet and Arrow files.
+
+    Returns:
+        module: The pyarrow module.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet and Arrow files need pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def export_scores(db, path, fmt=None):
+    """Write all scores to a file, one chunk at a time.
+
+    Args:
+        db (DatabaseManager): Database to export from.
+        path (str): Output file.
+        fmt (str, optional): "csv", "parquet" or "arrow". Defaults to the
+            format matching the file extension.
+
+    Returns:
+        int: Number of rows written.
+    """
+    fmt = fmt or detect_format(path)
+    chunks = db.iter_scores(CHUNK_SIZE)
+    if fmt == "csv":
+        return _export_csv(chunks, path)
+    return _export_arrow(chunks, path, fmt)
+
+
+def _export_csv(chunks, path):
+    """Write score chunks to a CSV file with a header row.
+
+    Args:
+        chunks (iterable): Lists of score tuples.
+        path (str): Output file.
+
+    Returns:
+        int: Number of rows written.
+    """
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def _export_arrow(chunks, path, fmt):
+    """Write score chunks to a Parquet or Arrow IPC file as record batches.
+
+    Args:
+        chunks (iterable): Lists of score tuples.
+        path (str): Output file.
+        fmt (str): "parquet" or "arrow".
+
+    Returns:
+        int: Number of rows written.
+    """
+    pa = _require_pyarrow()
+    schema = pa.schema([
+        ("name", pa.string()),
+        ("score", pa.int64()),
+        ("difficulty", pa.string()),
+        ("subject", pa.string()),
+        ("date", pa.string()),
+    ])
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    count = 0
+    try:
+        for rows in chunks:
+            columns = [list(column) for column in zip(*rows)]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            count += len(rows)
+    finally:
+        writer.close()
+    return count
+
+
+def read_scores(path, fmt=None):
+    """Stream score rows from a file.
+
+    Args:
+        path (str): Input file.
+        fmt (str, optional): "csv", "parquet" or "arrow". Defaults to the
+            format matching the file extension.
+
+    Yields:
+        tuple: (name, score, difficulty, subject, date) for each row. Missing
+            or empty dates are returned as None.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == "csv":
+        rows = _read_csv(path)
+    else:
+        rows = _read_arrow(path, fmt)
+    for name, score, difficulty, subject, date in rows:
+        yield name, int(score), difficulty, subject, date or None
+
+
+def _read_csv(path):
+    """Stream rows from a CSV file written by ``export_scores``.
+
+    Columns are matched by the header row, so extra columns are ignored and
+    the date column may be left out.
+
+    Args:
+        path (str): Input file.
+
+    Yields:
+        tuple: Values in COLUMNS order.
+    """
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        missing = [column for column in COLUMNS if column not in header and column != "date"]
+        if missing:
+            raise ValueError(f"{path} is missing the column(s) {', '.join(missing)}")
+        indexes = [header.index(column) if column in header else None for column in COLUMNS]
+        for record in reader:
+            yield tuple(record[i] if i is not None and i < len(record) else None for i in indexes)
+
+
+def _read_arrow(path, fmt):
+    """Stream rows from a Parquet or Arrow IPC file, one record batch at a time.
+
+    Args:
+        path (str): Input file.
+        fmt (str): "parquet" or "arrow".
+
+    Yields:
+        tuple: Values in COLUMNS order.
+    """
+    pa = _require_pyarrow()
+    if fmt == "parquet":
+        batches = pa.parquet.ParquetFile(path).iter_batches(batch_size=CHUNK_SIZE, columns=COLUMNS)
+    else:
+        reader = pa.ipc.open_file(path)
+        batches = (reader.get_batch(i).select(COLUMNS) for i in range(reader.num_record_batches))
+    for batch in batches:
+        yield from zip(*(batch.column(column).to_pylist() for column in COLUMNS))
+
+
+def import_scores(db, paths):
+    """Merge score files into the database in a single transaction.
+
+    Args:
+        db (DatabaseManager): Database to import into.
+        paths (list): Input files, in any supported format.
+
+    Returns:
+        int or None: Number of new rows inserted, or None on a database error.
+    """
+    def rows():
+        for path in paths:
+            yield from read_scores(path)
+
+    return db.import_scores(rows(), CHUNK_SIZE)
+
+
+def main(argv=None):
+    """Run the score import/export command line tool.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(prog="mathgame scores", description="Export or merge score history.")
+    parser.add_argument("--db", default="scores.db", help="score database (default: scores.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write all scores to a file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=sorted(set(FORMATS.values())))
+    import_parser = commands.add_parser("import", help="merge score files into the database")
+    import_parser.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db)
+    if not db.init_db():
+        print(f"Could not open score database {args.db}")
+        return 1
+    try:
+        if args.command == "export":
+            count = export_scores(db, args.path, args.format)
+            print(f"Exported {count} scores to {args.path}")
+        else:
+            count = import_scores(db, args.paths)
+            if count is None:
+                return 1
+            print(f"Imported {count} new scores into {args.db}")
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
@@ -0,0 +1,141 @@
+"""Crash-safe journal of the running game.
+
+The game state is small: points, progress and the current question. Each
+change is appended to a journal file as one compact JSON line, so an
+interrupted game can be resumed from the last line when the app starts
+again. Writes happen on a background thread, so recording a snapshot only
+costs putting it on a queue. Every COMPACT_EVERY snapshots the journal is
+rewritten to hold just the latest one, which keeps the file small.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+
+# Default journal file, next to the score database.
+SESSION_PATH = "session.journal"
+
+# Snapshots appended before the journal is compacted.
+COMPACT_EVERY = 50
+
+# Version of the snapshot format; journals with another version are ignored.
+SNAPSHOT_VERSION = 3
+
+# Queue item telling the writer thread to delete the journal.
+_CLEAR = object()
+
+
+class SessionJournal:
+    """Append-only journal of game state snapshots, written in the background.
+
+    Attributes:
+        path (str): Path of the journal file.
+    """
+
+    def __init__(self, path=SESSION_PATH):
+        """Start the writer thread.
+
+        Args:
+            path (str, optional): Path of the journal file. Defaults to SESSION_PATH.
+        """
+        self.path = path
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._write_loop, name="session-journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, snapshot):
+        """Queue a snapshot to be appended to the journal.
+
+        Args:
+            snapshot (dict): JSON-serializable game state.
+        """
+        self._queue.put(dict(snapshot, version=SNAPSHOT_VERSION))
+
+    def clear(self):
+        """Queue deletion of the journal, for when a game ends normally."""
+        self._queue.put(_CLEAR)
+
+    def close(self):
+        """Write all queued snapshots and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def load(self):
+        """Read the latest snapshot from the journal.
+
+        A partly written last line, left by a crash during a write, is
+        skipped in favour of the line before it.
+
+        Returns:
+            dict or None: The latest snapshot, or None if there is no
+                unfinished game.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+        for line in reversed(lines):
+            try:
+                snapshot = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(snapshot, dict) and snapshot.get("version") == SNAPSHOT_VERSION:
+                return snapshot
+            return None
+        return None
+
+    def _write_loop(self):
+        """Append queued snapshots to the journal until close is called."""
+        written = 0
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            # Only the newest of the snapshots queued meanwhile is worth writing
+            stop = False
+            while not self._queue.empty():
+                following = self._queue.get()
+                if following is None:
+                    stop = True
+                    break
+                item = following
+            try:
+                if item is _CLEAR:
+                    if os.path.exists(self.path):
+                        os.remove(self.path)
+                    written = 0
+                elif written >= COMPACT_EVERY:
+                    self._compact(item)
+                    written = 1
+                else:
+                    self._append(item)
+                    written += 1
+            except OSError as e:
+                print(f"Could not write session journal {self.path}: {e}")
+            if stop:
+                return
+
+    def _append(self, snapshot):
+        """Append one snapshot and make sure it reaches the disk."""
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self, snapshot):
+        """Replace the journal with a single snapshot.
+
+        The new journal is written to a temporary file first and moved into
+        place, so a crash leaves either the old or the new journal.
+        """
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
@@ -0,0 +1,149 @@
+"""Simulated games for profiling.
+
+A synthetic player plays games without a window: it answers correctly with
+a given probability, otherwise submits the answer of another question, and
+skips a question after MAX_WRONG wrong answers. The player's choices and
+every game's question selection come from one seed, so a run with the same
+options repeats exactly. This gives a repeatable load on the verifier and
+the database, and with ``--record`` writes recordings that
+``mathgame replay`` can run again.
+
+Usage::
+
+    mathgame simulate --games 100 --seed 42
+    mathgame simulate --difficulty adaptive --accuracy 0.6 --record recordings/sim
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+from replay import SessionRecorder, timing_summary
+
+# Wrong answers after which the synthetic player skips the question.
+MAX_WRONG = 2
+
+# Questions shown in a game before the player gives up on finishing it.
+MAX_QUESTIONS = 100
+
+# Range of the player's answer times in seconds.
+ANSWER_TIME_RANGE = (2.0, 40.0)
+
+
+def play_game(manager, player_rng, accuracy, seed):
+    """Play one game with the synthetic player.
+
+    Args:
+        manager (GameManager): Headless game manager with the difficulty,
+            subjects and player name set.
+        player_rng (random.Random): Source of the player's choices.
+        accuracy (float): Probability of answering a question correctly.
+        seed (int): Seed of the game's question selection.
+
+    Returns:
+        list: Time in ms each submitted answer took to check.
+    """
+    from logic import GAME_LENGTH
+    from questions import iter_questions
+
+    answers = [question_data.answer for _, _, _, question_data in iter_questions(manager.questions)]
+    check_ms = []
+    manager.start_game(seed=seed)
+    shown = 0
+    while manager.questions_completed < GAME_LENGTH and shown < MAX_QUESTIONS:
+        shown += 1
+        for attempt in range(MAX_WRONG + 1):
+            if attempt == MAX_WRONG:
+                manager.skip_question()
+                break
+            if player_rng.random() < accuracy:
+                answer = manager.correct_answer
+            else:
+                answer = player_rng.choice(answers)
+            start = time.perf_counter()
+            correct = manager.check_answer(answer, round(player_rng.uniform(*ANSWER_TIME_RANGE), 3))
+            check_ms.append((time.perf_counter() - start) * 1000)
+            if correct:
+                break
+    if manager.questions_completed < GAME_LENGTH:
+        manager.finish_game()
+    return check_ms
+
+
+def main(argv=None):
+    """Run simulated games and report how long they took.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Process exit code.
+    """
+    parser = argparse.ArgumentParser(prog="mathgame simulate", description="Play simulated games without a window.")
+    parser.add_argument("--games", type=int, default=10, help="games to play (default: 10)")
+    parser.add_argument("--seed", type=int, help="seed of the whole run (default: random, printed)")
+    parser.add_argument("--difficulty", choices=["easy", "hard", "mixed", "adaptive"], default="easy",
+                        help="difficulty (default: easy)")
+    parser.add_argument("--subjects", nargs="+", help="subjects (default: all)")
+    parser.add_argument("--weights", help="mixing weights file (default: mixing.json if present)")
+    parser.add_argument("--accuracy", type=float, default=0.8,
+                        help="probability of a correct answer (default: 0.8)")
+    parser.add_argument("--player", default="simulated", help="player name (default: simulated)")
+    parser.add_argument("--db", help="score database to use (default: a temporary database)")
+    parser.add_argument("--record", metavar="DIR", help="write a recording of each game to DIR")
+    parser.add_argument("--verbose", action="store_true", help="show what the game prints")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="trace memory use and print it by subsystem after the games")
+    args = parser.parse_args(argv)
+
+    if args.memory_report:
+        import diagnostics
+        diagnostics.start_memory_tracing()
+
+    from db import DatabaseManager
+    from logic import GameManager
+    from mixing import load_weights
+
+    seed = random.randrange(2**32) if args.seed is None else args.seed
+    player_rng = random.Random(seed)
+    print(f"Simulating {args.games} {args.difficulty} games with seed {seed}")
+
+    check_ms = []
+    save_ms = []
+    with contextlib.ExitStack() as stack:
+        db_path = args.db
+        if db_path is None:
+            db_path = os.path.join(stack.enter_context(tempfile.TemporaryDirectory()), "simulate.db")
+        db = DatabaseManager(db_path)
+        db.init_db()
+        recorder = SessionRecorder(args.record) if args.record else None
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        manager = GameManager(db=db, recorder=recorder)
+        manager.set_difficulty(args.difficulty)
+        manager.set_subjects(args.subjects or list(manager.questions))
+        if args.weights:
+            manager.set_weights(load_weights(args.weights))
+        manager.player_name = args.player
+
+        start = time.perf_counter()
+        for _ in range(args.games):
+            check_ms.extend(play_game(manager, player_rng, args.accuracy, player_rng.randrange(2**32)))
+            save_start = time.perf_counter()
+            manager.save_score(args.player)
+            save_ms.append((time.perf_counter() - save_start) * 1000)
+        seconds = time.perf_counter() - start
+
+    print(f"Played {args.games} games in {seconds:.2f} s")
+    print(f"Checking: {timing_summary(check_ms)}")
+    if save_ms:
+        ordered = sorted(save_ms)
+        print(f"Saving scores: median {ordered[len(ordered) // 2]:.2f} ms, max {ordered[-1]:.2f} ms")
+    if args.record:
+        print(f"Recordings written to {args.record}")
+    if args.memory_report:
+        diagnostics.print_memory_report()
+    return 0
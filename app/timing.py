@@ -0,0 +1,60 @@
+"""Monotonic, high-resolution timing of answers.
+
+The on-screen clock is driven by a QTimer, whose ticks can be delayed or
+dropped when the event loop is busy. Scoring therefore uses a Stopwatch
+based on ``time.perf_counter_ns`` instead, and the clock only displays it.
+"""
+
+import time
+
+
+class Stopwatch:
+    """Measures elapsed time that can be paused and resumed.
+
+    Time is accumulated in integer nanoseconds from ``time.perf_counter_ns``,
+    which is monotonic and unaffected by changes to the system clock.
+    """
+
+    def __init__(self):
+        """Initialize a stopped stopwatch with no elapsed time."""
+        self._accumulated_ns = 0
+        self._started_ns = None
+
+    @property
+    def running(self):
+        """bool: True if the stopwatch is currently counting."""
+        return self._started_ns is not None
+
+    def start(self):
+        """Reset the elapsed time to zero and start counting."""
+        self._accumulated_ns = 0
+        self._started_ns = time.perf_counter_ns()
+
+    def pause(self):
+        """Stop counting, keeping the elapsed time. Does nothing if already paused."""
+        if self._started_ns is not None:
+            self._accumulated_ns += time.perf_counter_ns() - self._started_ns
+            self._started_ns = None
+
+    def resume(self):
+        """Continue counting from the elapsed time. Does nothing if already running."""
+        if self._started_ns is None:
+            self._started_ns = time.perf_counter_ns()
+
+    def elapsed_ns(self):
+        """Return the elapsed time.
+
+        Returns:
+            int: Elapsed time in nanoseconds, excluding paused periods.
+        """
+        if self._started_ns is None:
+            return self._accumulated_ns
+        return self._accumulated_ns + time.perf_counter_ns() - self._started_ns
+
+    def elapsed(self):
+        """Return the elapsed time in seconds.
+
+        Returns:
+            float: Elapsed time in seconds, excluding paused periods.
+        """
+        return self.elapsed_ns() / 1e9
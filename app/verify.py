@@ -0,0 +1,461 @@
+"""Answer verification helpers shared by the game and offline tools.
+
+This module holds the symbolic comparison logic used to decide whether a
+player's answer matches the stored answer. The comparison is done in stages
+of increasing cost, and the question metadata produced by ``analysis.py``
+decides how far a given question is allowed to go. Questions that ask for
+the answer in a particular form, such as "Expand" and "Factor", only accept
+that form, not every expression equal to the stored answer.
+
+Before any comparison, answers are looked up among the precomputed accepted
+variants of the stored answer: first by normalized text, which needs no
+parsing, then by a fingerprint of the parsed expression.
+
+Answers that list solutions, such as ``x = 2,\\; 3`` or ``x = \\pm 4``, are
+compared root by root instead, since ``parse_latex`` silently drops
+everything after a top-level comma.
+"""
+
+import hashlib
+import math
+import re
+import time
+from functools import lru_cache
+from sympy import Mul, Symbol, expand, preorder_traversal, simplify, srepr
+from sympy.core.function import AppliedUndef
+from sympy.core.relational import Equality
+from sympy.parsing.latex import parse_latex
+from lexer import validate_latex
+
+# Strategies that accept any answer equal to the stored one, cheapest first.
+# Each strategy also runs the stages of the strategies listed before it.
+EQUIVALENCE_STRATEGIES = ("structural", "expand", "simplify")
+
+# Strategies that accept only answers in the form a question asks for:
+# "expanded" accepts expanded answers, "factored" products, equal to the
+# stored answer.
+FORM_STRATEGIES = ("expanded", "factored")
+
+STRATEGIES = EQUIVALENCE_STRATEGIES + FORM_STRATEGIES
+
+# Strategy used for questions without precomputed metadata.
+DEFAULT_STRATEGY = "simplify"
+
+# Time budget in seconds for questions without precomputed metadata.
+DEFAULT_TIMEOUT = 3.0
+
+# Expressions whose expansion would have more terms than this are not
+# expanded or simplified, since a single stage could far exceed any time
+# budget, as for (x+1)^{3000}.
+MAX_EXPANDED_TERMS = 200
+
+
+# Splits LaTeX into command names, escaped characters and single characters.
+_LATEX_TOKEN = re.compile(r"\\[A-Za-z]+|\\.|\S")
+
+# Spacing and sizing commands that do not change the meaning of an answer.
+_IGNORED_COMMANDS = {"\\,", "\\;", "\\:", "\\!", "\\ ", "\\left", "\\right"}
+
+# Commands with an equivalent, preferred spelling.
+_COMMAND_ALIASES = {"\\dfrac": "\\frac", "\\tfrac": "\\frac", "\\times": "\\cdot"}
+
+# Braces around a single character in a superscript or subscript, e.g. x^{2}.
+_SINGLE_BRACED = re.compile(r"([\^_])\{(\w)\}")
+
+# Spacing commands, removed before a list of roots is split at its commas.
+_SPACING = re.compile(r"\\[,;:! ]")
+
+
+def normalize_latex(text):
+    """Normalize a LaTeX answer so that trivially different spellings compare equal.
+
+    Removes whitespace and spacing commands, drops ``\\left``/``\\right``,
+    replaces aliased commands and unwraps single-character superscripts.
+    A space is kept after a command name that is followed by a letter, so
+    ``\\ln x`` does not turn into the unknown command ``\\lnx``.
+
+    Args:
+        text (str): The answer in LaTeX format.
+
+    Returns:
+        str: The normalized answer.
+    """
+    parts = []
+    previous = ""
+    for token in _LATEX_TOKEN.findall(text):
+        if token in _IGNORED_COMMANDS:
+            continue
+        token = _COMMAND_ALIASES.get(token, token)
+        if previous[1:].isalpha() and previous.startswith("\\") and token.isalpha():
+            parts.append(" ")
+        parts.append(token)
+        previous = token
+    return _SINGLE_BRACED.sub(r"\1\2", "".join(parts))
+
+
+def fingerprint(expr):
+    """Hash a parsed expression into a short, stable fingerprint.
+
+    SymPy keeps parsed expressions in a canonical argument order, so equal
+    trees always produce the same fingerprint.
+
+    Args:
+        expr (sympy.Basic): The parsed expression.
+
+    Returns:
+        str: Hex digest identifying the expression tree.
+    """
+    return hashlib.sha1(srepr(expr).encode("utf-8")).hexdigest()[:16]
+
+
+def is_accepted_text(text, entry):
+    """Check whether an unparsed answer is one of the accepted spellings.
+
+    Args:
+        text (str): The player's answer in LaTeX format.
+        entry (dict): Metadata of the question, as returned by ``analysis.load_metadata``.
+
+    Returns:
+        bool: True if the normalized answer is a known correct spelling.
+    """
+    return normalize_latex(text) in entry.get("accepted_text", ())
+
+
+def is_accepted_expression(expr, entry):
+    """Check whether a parsed answer is one of the accepted expression forms.
+
+    Args:
+        expr (sympy.Basic): The player's parsed answer.
+        entry (dict): Metadata of the question, as returned by ``analysis.load_metadata``.
+
+    Returns:
+        bool: True if the expression's fingerprint is a known correct form.
+    """
+    return fingerprint(expr) in entry.get("fingerprints", ())
+
+
+@lru_cache(maxsize=1024)
+def parse_answer(latex):
+    """Parse a LaTeX answer into a SymPy expression, caching the result.
+
+    Stored answers are parsed on every check, and the player's answer is
+    already parsed by the live preview before it is submitted, so caching
+    avoids paying the ANTLR parse cost more than once per answer string.
+
+    Args:
+        latex (str): The answer in LaTeX format.
+
+    Returns:
+        sympy.Basic: The parsed expression.
+
+    Raises:
+        LaTeXParsingError: If the input is not valid LaTeX.
+    """
+    return parse_latex(latex)
+
+
+def answers_match(parsed_answer, parsed_correct, strategy=DEFAULT_STRATEGY, timeout=None):
+    """Compare two parsed answers using the given verification strategy.
+
+    The "structural" strategy only compares expression trees. "expand" also
+    accepts answers whose difference expands to zero, and "simplify" finally
+    falls back to ``sympy.simplify``. The form strategies "expanded" and
+    "factored" accept an answer only if it is equal and written in the asked
+    form. Equations are compared side by side.
+
+    Args:
+        parsed_answer (sympy.Basic): The player's parsed answer.
+        parsed_correct (sympy.Basic): The parsed correct answer.
+        strategy (str, optional): One of STRATEGIES. Defaults to DEFAULT_STRATEGY.
+        timeout (float, optional): Time budget in seconds. Stages that would
+            start after the budget is spent are skipped. Defaults to None (no limit).
+
+    Expressions that would expand into more than MAX_EXPANDED_TERMS terms
+    are only compared structurally, since a single stage cannot be
+    interrupted once it has started.
+
+    Returns:
+        bool: True if the answers are considered equal, False otherwise.
+    """
+    if parsed_answer == parsed_correct:
+        return True
+
+    answer_is_equation = isinstance(parsed_answer, Equality)
+    correct_is_equation = isinstance(parsed_correct, Equality)
+    if answer_is_equation != correct_is_equation:
+        return False
+
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    if correct_is_equation:
+        return (_expressions_match(parsed_answer.lhs, parsed_correct.lhs, strategy, deadline)
+                and _expressions_match(parsed_answer.rhs, parsed_correct.rhs, strategy, deadline))
+    return _expressions_match(parsed_answer, parsed_correct, strategy, deadline)
+
+
+def verify_answer(answer, correct_answer, entry=None, strategy=DEFAULT_STRATEGY, timeout=DEFAULT_TIMEOUT):
+    """Decide whether an answer is correct, as the game does.
+
+    Tries the precomputed spellings and forms of the correct answer first.
+    Otherwise validates the answer with the lexer, parses both answers and
+    compares them with the given strategy.
+
+    Args:
+        answer (str): The player's answer in LaTeX format.
+        correct_answer (str): The stored correct answer in LaTeX format.
+        entry (dict, optional): Metadata of the question, as returned by
+            ``analysis.load_metadata``. Defaults to None (no precomputed forms).
+        strategy (str, optional): One of STRATEGIES. Defaults to DEFAULT_STRATEGY.
+        timeout (float, optional): Time budget in seconds for the comparison.
+            Defaults to DEFAULT_TIMEOUT.
+
+    Returns:
+        bool: True if the answer is correct.
+
+    Raises:
+        LaTeXSyntaxError: If the answer is structurally invalid.
+        Exception: If the LaTeX parser rejects the answer (usually LaTeXParsingError).
+    """
+    entry = entry or {}
+    if is_accepted_text(answer, entry):
+        return True
+    validate_latex(answer)
+    if lists_roots(answer) or lists_roots(correct_answer):
+        return roots_match(answer, correct_answer, strategy, timeout)
+    parsed_answer = parse_answer(answer)
+    if is_accepted_expression(parsed_answer, entry):
+        return True
+    return answers_match(parsed_answer, parse_answer(correct_answer), strategy, timeout)
+
+
+def split_top_level(text):
+    """Split a list of roots like "2, -\\frac{1}{2}" at commas outside brackets.
+
+    Args:
+        text (str): The list in LaTeX format, without spacing commands.
+
+    Returns:
+        list: The non-empty parts.
+    """
+    parts = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(text):
+        if char in "({[":
+            depth += 1
+        elif char in ")}]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part for part in parts if part.strip()]
+
+
+def expand_pm(text):
+    """Spell out each \\pm in a root as a + and a - alternative.
+
+    Args:
+        text (str): A root in LaTeX format.
+
+    Returns:
+        list: The root with every combination of signs.
+    """
+    head, found, tail = text.partition("\\pm")
+    if not found:
+        return [text]
+    return [head + sign + rest for sign in ("+", "-") for rest in expand_pm(tail)]
+
+
+def split_roots(text):
+    """Split an answer like "x = 2,\\; -3" or "x = \\pm 4" into its variable and roots.
+
+    Args:
+        text (str): The answer in LaTeX format.
+
+    Returns:
+        tuple or None: (variable, roots) in LaTeX format, where roots lists
+            both signs of each \\pm, or None if the answer is not of the
+            form "variable = roots".
+    """
+    variable, found, roots_text = _SPACING.sub(" ", text).partition("=")
+    if not found or "=" in roots_text:
+        return None
+    roots = [root for part in split_top_level(roots_text) for root in expand_pm(part)]
+    return variable.strip(), roots
+
+
+def lists_roots(text):
+    """Check whether an answer lists more than one root, as "x = 2,\\; 3" does.
+
+    Args:
+        text (str): The answer in LaTeX format.
+
+    Returns:
+        bool: True if the answer has to be compared with roots_match.
+    """
+    split = split_roots(text)
+    return split is not None and len(split[1]) > 1
+
+
+def roots_match(answer, correct_answer, strategy=DEFAULT_STRATEGY, timeout=None):
+    """Compare two answers that list roots, in any order.
+
+    The answer is correct if it solves for the same variable, each of its
+    roots equals a correct root and each correct root is listed.
+
+    Args:
+        answer (str): The player's answer in LaTeX format.
+        correct_answer (str): The stored correct answer in LaTeX format.
+        strategy (str, optional): Strategy for comparing single roots, one
+            of STRATEGIES. Defaults to DEFAULT_STRATEGY.
+        timeout (float, optional): Time budget in seconds for each root.
+            Defaults to None (no limit).
+
+    Returns:
+        bool: True if the answers list the same roots.
+
+    Raises:
+        Exception: If the LaTeX parser rejects a part of the answer.
+    """
+    answer_split = split_roots(answer)
+    correct_split = split_roots(correct_answer)
+    if answer_split is None or correct_split is None:
+        return False
+    (variable, roots), (correct_variable, correct_roots) = answer_split, correct_split
+    if not roots or parse_answer(variable) != parse_answer(correct_variable):
+        return False
+    correct_parsed = [parse_answer(root) for root in correct_roots]
+    listed = set()
+    for root in roots:
+        parsed = parse_answer(root)
+        matches = [i for i, correct in enumerate(correct_parsed) if answers_match(parsed, correct, strategy, timeout)]
+        if not matches:
+            return False
+        listed.update(matches)
+    return len(listed) == len(correct_parsed)
+
+
+def _expressions_match(a, b, strategy, deadline):
+    """Compare two expressions stage by stage until one succeeds or the strategy ends.
+
+    Args:
+        a (sympy.Basic): First expression.
+        b (sympy.Basic): Second expression.
+        strategy (str): One of STRATEGIES.
+        deadline (float or None): ``time.perf_counter()`` value after which no
+            further stage is started.
+
+    Returns:
+        bool: True if the expressions are considered equal.
+    """
+    if a == b:
+        return True
+    if strategy == "structural" or _past(deadline):
+        return False
+    if expanded_terms(a) + expanded_terms(b) > MAX_EXPANDED_TERMS:
+        print(f"Not comparing {a} and {b}: expanding them would take too long")
+        return False
+
+    try:
+        if strategy == "expanded":
+            return is_expanded(a) and expand(a - b) == 0
+        if strategy == "factored":
+            a, b = multiply_applications(a), multiply_applications(b)
+            return not a.is_Add and expand(a - b) == 0
+        difference = a - b
+        if expand(difference) == 0:
+            return True
+        if strategy == "expand" or _past(deadline):
+            return False
+        return simplify(difference) == 0
+    except (TypeError, ValueError) as e:
+        print(f"Could not compare {a} and {b}: {e}")
+        return False
+
+
+def expanded_terms(expr):
+    """Estimate the number of terms ``expand`` turns an expression into.
+
+    Sums add up the terms of their arguments, products multiply them and an
+    integer power of a sum counts its monomials. Other expressions count as
+    their largest argument, since ``expand`` also expands inside them. The
+    estimate stops growing past MAX_EXPANDED_TERMS, so that huge exponents
+    are cheap to estimate.
+
+    Args:
+        expr (sympy.Basic): A parsed expression.
+
+    Returns:
+        int: The estimated number of terms, at most MAX_EXPANDED_TERMS + 1.
+    """
+    limit = MAX_EXPANDED_TERMS + 1
+    if expr.is_Add:
+        return min(limit, sum(expanded_terms(arg) for arg in expr.args))
+    if expr.is_Mul:
+        terms = 1
+        for arg in expr.args:
+            terms = min(limit, terms * expanded_terms(arg))
+        return terms
+    if expr.is_Pow and expr.exp.is_Integer:
+        base_terms = expanded_terms(expr.base)
+        exponent = abs(int(expr.exp))
+        if base_terms == 1:
+            return 1
+        if exponent >= limit:
+            return limit
+        # Monomials of degree exponent in base_terms variables
+        return min(limit, math.comb(base_terms + exponent - 1, exponent))
+    return max((expanded_terms(arg) for arg in expr.args), default=1)
+
+
+def is_expanded(expr):
+    """Check that no product or integer power in an expression still contains a sum.
+
+    parse_latex keeps nested sums unevaluated, so comparing with
+    ``expand(expr)`` would also reject answers that are only bracketed
+    differently.
+
+    Args:
+        expr (sympy.Basic): A parsed expression.
+
+    Returns:
+        bool: True if the expression is expanded.
+    """
+    for node in preorder_traversal(expr):
+        if node.is_Mul and any(arg.is_Add for arg in node.args):
+            return False
+        if node.is_Pow and node.base.is_Add and node.exp.is_Integer and node.exp > 1:
+            return False
+    return True
+
+
+def multiply_applications(expr):
+    """Replace single-letter function applications such as x(a) by products x*a.
+
+    ``parse_latex`` reads a letter followed by brackets, as in ``x(x+5)``,
+    as a function application, which a player means as a product.
+
+    Args:
+        expr (sympy.Basic): A parsed expression.
+
+    Returns:
+        sympy.Basic: The expression with such applications multiplied out.
+    """
+    replacements = {}
+    for node in expr.atoms(AppliedUndef):
+        name = node.func.__name__
+        if len(name) == 1 and len(node.args) == 1:
+            replacements[node] = Mul(Symbol(name), multiply_applications(node.args[0]))
+    return expr.xreplace(replacements) if replacements else expr
+
+
+def _past(deadline):
+    """Check whether a stage deadline has passed.
+
+    Args:
+        deadline (float or None): ``time.perf_counter()`` deadline, or None for no limit.
+
+    Returns:
+        bool: True if the deadline is set and has passed.
+    """
+    return deadline is not None and time.perf_counter() > deadline